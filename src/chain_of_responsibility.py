@@ -1,4 +1,9 @@
-from abc import ABC, abstractmethod
+from abc import ABC
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 """
 # Chain of Responsibility Pattern
@@ -29,41 +34,345 @@ Authorization/authentication systems.
 **Example in Python (Authorization system use-case):**
 """
 
+# Struct-of-arrays batch of requests: one column per request field plus the
+# original position of every row. Columns are NumPy arrays when NumPy is
+# installed, so handler predicates run as whole-column operations.
+class RequestBatch:
+    SCALAR_TYPES = (bool, int, float, str)
+
+    def __init__(self, columns, index=None, length=None, present=None):
+        if length is None:
+            length = len(next(iter(columns.values()))) if columns else 0
+        self.columns = columns
+        self.index = index if index is not None else list(range(length))
+        # Per-column presence masks, only for fields some requests lack
+        self.present = present or {}
+        if np is not None:
+            self.columns = {name: self._to_array(column) for name, column in columns.items()}
+            self.present = {name: np.asarray(mask, dtype=bool) for name, mask in self.present.items()}
+            self.index = np.asarray(self.index, dtype=np.intp)
+
+    @classmethod
+    def _to_array(cls, column):
+        # Only scalar columns are vectorised; anything else (lists, dicts,
+        # missing values) is kept one object per row
+        if isinstance(column, np.ndarray):
+            return column
+        if all(type(value) in cls.SCALAR_TYPES for value in column) and len({type(value) for value in column}) <= 1:
+            return np.asarray(column)
+        array = np.empty(len(column), dtype=object)
+        for position, value in enumerate(column):
+            array[position] = value
+        return array
+
+    @classmethod
+    def from_requests(cls, requests):
+        requests = list(requests)
+        keys = {}
+        for request in requests:
+            keys.update(dict.fromkeys(request))
+        columns, present = {}, {}
+        for key in keys:
+            columns[key] = [request.get(key) for request in requests]
+            mask = [key in request for request in requests]
+            if not all(mask):
+                present[key] = mask
+        return cls(columns, length=len(requests), present=present)
+
+    def __len__(self):
+        return len(self.index)
+
+    def row(self, position):
+        # Rebuilds the request as handle_request would see it: absent fields
+        # are left out and values are plain Python objects
+        row = {}
+        for name, column in self.columns.items():
+            present = self.present.get(name)
+            if present is not None and not present[position]:
+                continue
+            value = column[position]
+            row[name] = value.item() if np is not None and isinstance(value, np.generic) else value
+        return row
+
+    def mask(self, name):
+        # Truthiness of a column; a missing field counts as False
+        column = self.columns.get(name)
+        if np is not None:
+            if column is None:
+                return np.zeros(len(self), dtype=bool)
+            return column.astype(bool)
+        if column is None:
+            return [False] * len(self)
+        return [bool(value) for value in column]
+
+    def take(self, mask):
+        if np is not None:
+            mask = np.asarray(mask, dtype=bool)
+            return RequestBatch({name: column[mask] for name, column in self.columns.items()},
+                                self.index[mask], present={name: p[mask] for name, p in self.present.items()})
+        positions = [position for position, keep in enumerate(mask) if keep]
+        columns = {name: [column[p] for p in positions] for name, column in self.columns.items()}
+        present = {name: [flags[p] for p in positions] for name, flags in self.present.items()}
+        return RequestBatch(columns, [self.index[p] for p in positions], len(positions), present)
+
+    def resolve(self, passed, result):
+        # Rows failing the predicate are answered with `result`; the rest continue
+        if np is not None:
+            handled = [(int(i), result) for i in self.index[~passed]]
+        else:
+            handled = [(i, result) for i, keep in zip(self.index, passed) if not keep]
+        return handled, self.take(passed)
+
+    def finish(self, result):
+        return [(int(i), result) for i in self.index], self.take([False] * len(self))
+
 # Handler Interface
 class Handler(ABC):
+    # Returned by process() to pass the request on to the next handler
+    CONTINUE = object()
+    # Set for handlers written against the original extension point, which
+    # override handle_request and call super().handle_request() to pass on
+    _legacy = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._legacy = cls.handle_request is not Handler.handle_request
+        if not cls._legacy and cls.process is Handler.process:
+            raise TypeError(f"{cls.__name__} must override process() or handle_request()")
+
     def __init__(self, successor=None):
         self._successor = successor
 
-    @abstractmethod
     def handle_request(self, request):
-        if self._successor:
-            return self._successor.handle_request(request)
+        # Walks the chain iteratively, so long chains cost no extra stack frames.
+        # A legacy handler only gets here through super(), to pass the request on.
+        handler = self._successor if self._legacy else self
+        while handler is not None:
+            result = handler.process(request)
+            if result is not Handler.CONTINUE:
+                return result
+            handler = handler._successor
         return None
 
+    def handle_batch(self, requests):
+        # Runs the whole batch through the chain one handler at a time; each
+        # handler only sees the rows its predecessors passed on
+        batch = requests if isinstance(requests, RequestBatch) else RequestBatch.from_requests(requests)
+        results = [None] * len(batch)
+        handler = self
+        while handler is not None and len(batch):
+            handled, batch = handler.process_batch(batch)
+            for index, result in handled:
+                results[index] = result
+            handler = handler._successor
+        return results
+
+    def process(self, request):
+        # Legacy handlers run the rest of the chain from handle_request, so
+        # their answer is final
+        return self.handle_request(request)
+
+    def process_batch(self, batch):
+        # Row-by-row fallback; handlers override this with column operations
+        handled, passed = [], []
+        for position, index in enumerate(batch.index):
+            result = self.process(batch.row(position))
+            passed.append(result is Handler.CONTINUE)
+            if result is not Handler.CONTINUE:
+                handled.append((int(index), result))
+        return handled, batch.take(passed)
+
 # Concrete Handlers
 class AuthenticationHandler(Handler):
-    def handle_request(self, request):
+    def process(self, request):
         if request.get('authenticated', False):
             print("Authentication successful")
-            return super().handle_request(request)
+            return Handler.CONTINUE
         else:
             print("Authentication failed")
             return "Unauthorized"
 
+    def process_batch(self, batch):
+        return batch.resolve(batch.mask('authenticated'), "Unauthorized")
+
 class AuthorizationHandler(Handler):
-    def handle_request(self, request):
+    def process(self, request):
         if request.get('authorized', False):
             print("Authorization successful")
-            return super().handle_request(request)
+            return Handler.CONTINUE
         else:
             print("Authorization failed")
             return "Forbidden"
 
+    def process_batch(self, batch):
+        return batch.resolve(batch.mask('authorized'), "Forbidden")
+
 class DataHandler(Handler):
-    def handle_request(self, request):
+    def process(self, request):
         print("Handling request data")
         return "Request processed successfully"
 
+    def process_batch(self, batch):
+        return batch.finish("Request processed successfully")
+
+# Hashable stand-in for a request, the default cache key: lists, dicts and sets are turned into
+# tuples and frozensets, recursively
+def _freeze(value):
+    if isinstance(value, dict):
+        return frozenset((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+# Wraps a handler and memoizes its decision (a result or Handler.CONTINUE),
+# keyed by a projection of the request. Entries expire after `ttl` seconds
+# (`negative_ttl` for rejections, which are not cached when it is 0) and the
+# least recently used entry is evicted once `maxsize` entries are held. The
+# wrapper takes the wrapped handler's place in the chain.
+class CachingHandler(Handler):
+    def __init__(self, handler, key=None, ttl=60.0, negative_ttl=None, maxsize=10_000, successor=None,
+                 clock=None):
+        import threading
+        import time
+        from collections import OrderedDict
+        super().__init__(successor if successor is not None else handler._successor)
+        self.handler = handler
+        self.key = key or _freeze
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.maxsize = maxsize
+        self._clock = clock or time.monotonic
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def process(self, request):
+        key = self.key(request)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        decision = self.handler.process(request)
+        ttl = self.ttl if decision is Handler.CONTINUE else self.negative_ttl
+        if ttl > 0:
+            with self._lock:
+                self._entries[key] = (decision, now + ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return decision
+
+    def invalidate(self, request=None):
+        with self._lock:
+            if request is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self.key(request), None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+# Flat, compiled form of a handler chain. The handlers' process methods are
+# kept in a tuple and run in a loop with the same short-circuit behaviour as
+# the chain; handlers can be inserted or removed at runtime, and with
+# profile=True per-handler call counts, hits and time spent are recorded.
+# A handler that only overrides handle_request walks its own successors, so it
+# is compiled as the last step and later steps are not reached.
+class HandlerPipeline:
+    def __init__(self, handlers=(), profile=False):
+        self._handlers = list(handlers)
+        self.profile = profile
+        self.reset_stats()
+        self._compile()
+
+    @classmethod
+    def compile(cls, chain, profile=False):
+        handlers = []
+        while chain is not None:
+            handlers.append(chain)
+            if chain._legacy:
+                break  # It passes requests on to its successors itself
+            chain = chain._successor
+        return cls(handlers, profile)
+
+    @property
+    def handlers(self):
+        return tuple(self._handlers)
+
+    def insert(self, index, handler):
+        self._handlers.insert(index, handler)
+        self._compile()
+
+    def append(self, handler):
+        self.insert(len(self._handlers), handler)
+
+    def remove(self, handler):
+        self._handlers.remove(handler)
+        self._compile()
+
+    def _compile(self):
+        self._steps = tuple(handler.process for handler in self._handlers)
+        for handler in self._handlers:
+            self._stats.setdefault(handler, {"calls": 0, "hits": 0, "time_ns": 0})
+
+    def reset_stats(self):
+        self._stats = {handler: {"calls": 0, "hits": 0, "time_ns": 0} for handler in self._handlers}
+
+    def stats(self):
+        return [(handler, dict(self._stats[handler])) for handler in self._handlers]
+
+    def handle_request(self, request):
+        if self.profile:
+            return self._handle_profiled(request)
+        continue_ = Handler.CONTINUE
+        for step in self._steps:
+            result = step(request)
+            if result is not continue_:
+                return result
+        return None
+
+    def handle_batch(self, requests):
+        batch = requests if isinstance(requests, RequestBatch) else RequestBatch.from_requests(requests)
+        results = [None] * len(batch)
+        for handler in self._handlers:
+            if not len(batch):
+                break
+            handled, batch = handler.process_batch(batch)
+            for index, result in handled:
+                results[index] = result
+        return results
+
+    def _handle_profiled(self, request):
+        from time import perf_counter_ns
+        continue_ = Handler.CONTINUE
+        for handler, step in zip(self._handlers, self._steps):
+            stats = self._stats[handler]
+            start = perf_counter_ns()
+            result = step(request)
+            stats["time_ns"] += perf_counter_ns() - start
+            stats["calls"] += 1
+            if result is not continue_:
+                stats["hits"] += 1
+                return result
+        return None
+
 if __name__ == "__main__":
     # Create the chain of responsibility
     handler_chain = AuthenticationHandler(
@@ -81,3 +390,23 @@ if __name__ == "__main__":
     print(handler_chain.handle_request(request1))  # Authentication successful, Authorization successful, Handling request data, Request processed successfully
     print(handler_chain.handle_request(request2))  # Authentication successful, Authorization failed, Forbidden
     print(handler_chain.handle_request(request3))  # Authentication failed, Unauthorized
+
+    # Process a burst of requests column by column; results keep the input order
+    print(handler_chain.handle_batch([request1, request2, request3]))  # ['Request processed successfully', 'Forbidden', 'Unauthorized']
+
+    # Cache authentication decisions per user; the second request skips the check.
+    # The key includes every field the wrapped handler looks at.
+    cached_chain = CachingHandler(
+        AuthenticationHandler(AuthorizationHandler(DataHandler())),
+        key=lambda request: (request.get('user'), request.get('authenticated', False)),
+        ttl=30,
+    )
+    cached_chain.handle_request({'user': 'alice', 'authenticated': True, 'authorized': True})
+    cached_chain.handle_request({'user': 'alice', 'authenticated': True, 'authorized': True})
+    print(cached_chain.stats())  # {'hits': 1, 'misses': 1, ...}
+
+    # Compile the chain into a flat pipeline and collect per-handler statistics
+    pipeline = HandlerPipeline.compile(handler_chain, profile=True)
+    print(pipeline.handle_request(request2))  # Authentication successful, Authorization failed, Forbidden
+    for handler, stats in pipeline.stats():
+        print(type(handler).__name__, stats)
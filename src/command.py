@@ -1,4 +1,11 @@
 from abc import ABC, abstractmethod
+import mmap
+import os
+import random
+import struct
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
 """
 # Command Pattern
@@ -38,72 +45,570 @@ class Command(ABC):
     def undo(self):
         pass
 
-# Concrete Command for adding text
+# Concrete Command for adding text at the end of the document
 class AddTextCommand(Command):
     def __init__(self, document, text):
         self.document = document
         self.text = text
+        self.position = None
 
     def execute(self):
-        self.document.add_text(self.text)
+        self.position = len(self.document)
+        self.document.insert(self.position, self.text)
 
     def undo(self):
-        self.document.remove_text(self.text)
+        # Remove exactly the text this command added, not the first match
+        self.document.delete(self.position, len(self.text))
 
-# Concrete Command for removing text
+# Concrete Command for removing the first occurrence of some text
 class RemoveTextCommand(Command):
     def __init__(self, document, text):
         self.document = document
         self.text = text
+        self.position = None
 
     def execute(self):
-        self.document.remove_text(self.text)
+        self.position = self.document.find(self.text)
+        if self.position >= 0:
+            self.document.delete(self.position, len(self.text))
 
     def undo(self):
-        self.document.add_text(self.text)
+        if self.position >= 0:
+            self.document.insert(self.position, self.text)
+
+# Concrete Command for inserting text at a position
+class InsertTextCommand(Command):
+    def __init__(self, document, position, text):
+        self.document = document
+        self.position = position
+        self.text = text
+
+    def execute(self):
+        self.document.insert(self.position, self.text)
+
+    def undo(self):
+        self.document.delete(self.position, len(self.text))
+
+# Concrete Command for deleting a range of text
+class DeleteTextCommand(Command):
+    def __init__(self, document, position, length):
+        self.document = document
+        self.position = position
+        self.length = length
+        self.deleted = None
+
+    def execute(self):
+        self.deleted = self.document.delete(self.position, self.length)
+
+    def undo(self):
+        self.document.insert(self.position, self.deleted)
+
+# Piece of the document: a slice of an immutable source string, stored as a
+# node of a treap ordered by position and keyed on subtree length
+class _Piece:
+    __slots__ = ("source", "start", "length", "priority", "left", "right", "size")
+
+    def __init__(self, source, start, length):
+        self.source = source
+        self.start = start
+        self.length = length
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.size = length
+
+def _size(piece):
+    return piece.size if piece is not None else 0
+
+def _update(piece):
+    piece.size = piece.length + _size(piece.left) + _size(piece.right)
+    return piece
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+def _split(piece, position):
+    # Splits into (first `position` characters, the rest)
+    if piece is None:
+        return None, None
+    left_size = _size(piece.left)
+    if position <= left_size:
+        left, right = _split(piece.left, position)
+        piece.left = right
+        return left, _update(piece)
+    if position >= left_size + piece.length:
+        left, right = _split(piece.right, position - left_size - piece.length)
+        piece.right = left
+        return _update(piece), right
+    offset = position - left_size
+    tail = _Piece(piece.source, piece.start + offset, piece.length - offset)
+    rest = piece.right
+    piece.right = None
+    piece.length = offset
+    return _update(piece), _merge(tail, rest)
+
+def _slices(piece):
+    stack = []
+    while stack or piece is not None:
+        while piece is not None:
+            stack.append(piece)
+            piece = piece.left
+        piece = stack.pop()
+        yield piece.source[piece.start:piece.start + piece.length]
+        piece = piece.right
+
+# Durable, append-only log of document edits. Records are buffered and a
+# background thread writes and fsyncs them in groups (every `group_size`
+# records or `commit_interval` seconds), so an edit never waits for the disk.
+# A document is recovered from its latest checkpoint plus the journal tail,
+# which is scanned through mmap.
+class CommandJournal:
+    RECORD = struct.Struct("<BQQ")  # kind, position, length
+    SNAPSHOT = struct.Struct("<Q")  # journal offset the snapshot is valid at
+    INSERT, DELETE, RESTORE = 1, 2, 3
+
+    def __init__(self, path, group_size=256, commit_interval=0.005):
+        self.path = path
+        self.group_size = group_size
+        self.commit_interval = commit_interval
+        self._file = open(path, "ab")
+        self._pending = []
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()
+        self._closed = False
+        self._writer = threading.Thread(target=self._group_commit, name="command-journal", daemon=True)
+        self._writer.start()
+
+    def log_insert(self, position, text):
+        data = text.encode("utf-8")
+        self._append(self.RECORD.pack(self.INSERT, position, len(data)) + data)
+
+    def log_delete(self, position, length):
+        self._append(self.RECORD.pack(self.DELETE, position, length))
+
+    def log_restore(self, content):
+        data = content.encode("utf-8")
+        self._append(self.RECORD.pack(self.RESTORE, 0, len(data)) + data)
+
+    def _append(self, record):
+        with self._lock:
+            if self._closed:
+                raise ValueError("Journal is closed")
+            self._pending.append(record)
+            if len(self._pending) >= self.group_size:
+                self._ready.notify()
+
+    def _group_commit(self):
+        while True:
+            with self._lock:
+                if not self._pending and not self._closed:
+                    self._ready.wait(self.commit_interval)
+                if self._closed and not self._pending:
+                    return
+            self.sync()
+
+    def sync(self):
+        with self._io_lock:
+            with self._lock:
+                records, self._pending = self._pending, []
+            if records:
+                self._file.write(b"".join(records))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            return self._file.tell()
+
+    def checkpoint(self, document, snapshot_path):
+        offset = self.sync()
+        temporary = snapshot_path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(self.SNAPSHOT.pack(offset))
+            f.write(document.snapshot().encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, snapshot_path)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._ready.notify()
+        self._writer.join()
+        self.sync()
+        self._file.close()
+
+    @classmethod
+    def replay(cls, document, journal_path, offset=0):
+        # Applies every complete record after `offset`; returns the offset just
+        # past the last complete record so a torn tail can be truncated
+        if not os.path.exists(journal_path) or os.path.getsize(journal_path) <= offset:
+            return offset
+        with open(journal_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log:
+            if hasattr(log, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                log.madvise(mmap.MADV_SEQUENTIAL)
+            end = len(log)
+            while offset + cls.RECORD.size <= end:
+                kind, position, length = cls.RECORD.unpack_from(log, offset)
+                payload_end = offset + cls.RECORD.size + (0 if kind == cls.DELETE else length)
+                if payload_end > end:
+                    break
+                if kind == cls.INSERT:
+                    document.insert(position, log[offset + cls.RECORD.size:payload_end].decode("utf-8"))
+                elif kind == cls.DELETE:
+                    document.delete(position, length)
+                elif kind == cls.RESTORE:
+                    document.restore(log[offset + cls.RECORD.size:payload_end].decode("utf-8"))
+                else:
+                    break
+                offset = payload_end
+        return offset
+
+    @classmethod
+    def recover(cls, journal_path, snapshot_path=None, **journal_options):
+        content, offset = "", 0
+        if snapshot_path is not None and os.path.exists(snapshot_path):
+            with open(snapshot_path, "rb") as f:
+                (offset,) = cls.SNAPSHOT.unpack(f.read(cls.SNAPSHOT.size))
+                content = f.read().decode("utf-8")
+        document = Document(content)
+        end = cls.replay(document, journal_path, offset)
+        if os.path.exists(journal_path) and os.path.getsize(journal_path) > end:
+            os.truncate(journal_path, end)
+        document.journal = cls(journal_path, **journal_options)
+        return document
 
 # Receiver class
 class Document:
-    def __init__(self):
-        self.content = ""
+    # Piece table kept in a treap: inserts and deletes split and merge pieces in
+    # O(log n) without copying existing text, which is only joined on demand.
+    def __init__(self, content="", echo=False, journal=None):
+        self._root = _Piece(content, 0, len(content)) if content else None
+        self.echo = echo
+        self.journal = journal
+
+    def __len__(self):
+        return _size(self._root)
+
+    @property
+    def content(self):
+        return "".join(_slices(self._root))
+
+    def text(self, position, length):
+        left, rest = _split(self._root, position)
+        middle, right = _split(rest, length)
+        text = "".join(_slices(middle))
+        self._root = _merge(_merge(left, middle), right)
+        return text
+
+    def snapshot(self):
+        return self.content
+
+    def restore(self, content):
+        if self.journal is not None:
+            self.journal.log_restore(content)
+        self._root = _Piece(content, 0, len(content)) if content else None
+        self._echo()
+
+    def find(self, text):
+        return self.content.find(text)
+
+    def insert(self, position, text):
+        if not 0 <= position <= len(self):
+            raise IndexError(f"Insert position {position} out of range")
+        if text:
+            if self.journal is not None:
+                self.journal.log_insert(position, text)
+            left, right = _split(self._root, position)
+            self._root = _merge(_merge(left, _Piece(text, 0, len(text))), right)
+        self._echo()
+
+    def delete(self, position, length):
+        if position < 0 or length < 0 or position + length > len(self):
+            raise IndexError(f"Delete range {position}:{position + length} out of range")
+        if self.journal is not None:
+            self.journal.log_delete(position, length)
+        left, rest = _split(self._root, position)
+        middle, right = _split(rest, length)
+        self._root = _merge(left, right)
+        self._echo()
+        return "".join(_slices(middle))
 
     def add_text(self, text):
-        self.content += text
-        print(f"Document content: '{self.content}'")
+        self.insert(len(self), text)
 
     def remove_text(self, text):
-        self.content = self.content.replace(text, "", 1)
-        print(f"Document content: '{self.content}'")
+        position = self.find(text)
+        if position >= 0:
+            self.delete(position, len(text))
+
+    def _echo(self):
+        if self.echo:
+            print(f"Document content: '{self.content}'")
+
+# Bounded undo/redo history. Consecutive small insertions are coalesced into
+# one command, the documents are snapshotted every `snapshot_interval`
+# commands so goto() can jump to any point without replaying the whole
+# history, and the oldest entries are evicted once the estimated size of the
+# history exceeds `memory_budget` bytes.
+class CommandHistory:
+    COMMAND_OVERHEAD = 64
+
+    def __init__(self, memory_budget=64 * 1024 * 1024, snapshot_interval=500, coalesce_limit=64):
+        self.memory_budget = memory_budget
+        self.snapshot_interval = snapshot_interval
+        self.coalesce_limit = coalesce_limit
+        self._undo = deque()
+        self._redo = []
+        self._snapshots = {}  # position -> {document: content}
+        self._documents = {}
+        self._base = 0  # position of the oldest command still held
+        self._size = 0
+        self._since_snapshot = 0
+        self._coalescible = None
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def position(self):
+        return self._base + len(self._undo)
+
+    @property
+    def size(self):
+        return self._size
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def push(self, command):
+        self._clear_redo()
+        document = getattr(command, "document", None)
+        if document is not None:
+            self._documents[document] = None
+        if self._coalescible is not None and self._coalesce(self._coalescible, command):
+            return
+        self._undo.append(command)
+        self._coalescible = command
+        self._size += self._command_size(command)
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_interval:
+            self._take_snapshot()
+        self._evict()
+
+    def undo(self):
+        self._coalescible = None
+        command = self._undo.pop()
+        command.undo()
+        self._redo.append(command)
+        return command
+
+    def redo(self):
+        self._coalescible = None
+        command = self._redo.pop()
+        command.execute()
+        self._undo.append(command)
+        return command
+
+    def goto(self, target):
+        current = self.position
+        if not self._base <= target <= current + len(self._redo):
+            raise IndexError(f"History position {target} out of range")
+        self._coalescible = None
+        snapshot = max((position for position in self._snapshots if position <= target), default=None)
+        if snapshot is not None and target - snapshot < abs(target - current) \
+                and self._can_restore(snapshot, max(current, target)):
+            timeline = list(self._undo) + self._redo[::-1]
+            for document, content in self._snapshots[snapshot].items():
+                document.restore(content)
+            for command in timeline[snapshot - self._base:target - self._base]:
+                command.execute()
+            self._undo = deque(timeline[:target - self._base])
+            self._redo = timeline[target - self._base:][::-1]
+            return
+        while self.position > target:
+            self.undo()
+        while self.position < target:
+            self.redo()
+
+    def _coalesce(self, last, command):
+        if type(last) is not type(command) or not isinstance(command, (AddTextCommand, InsertTextCommand)):
+            return False
+        if last.document is not command.document or self.position in self._snapshots:
+            return False
+        if len(last.text) + len(command.text) > self.coalesce_limit:
+            return False
+        if command.position != last.position + len(last.text):
+            return False
+        last.text += command.text
+        self._size += len(command.text)
+        return True
+
+    def _can_restore(self, snapshot, end):
+        documents = self._snapshots[snapshot]
+        timeline = list(self._undo) + self._redo[::-1]
+        start = min(snapshot, self.position)
+        return all(getattr(command, "document", None) in documents
+                   for command in timeline[start - self._base:end - self._base])
+
+    def _take_snapshot(self):
+        self._since_snapshot = 0
+        snapshot = {document: document.snapshot() for document in self._documents}
+        size = sum(len(content) for content in snapshot.values())
+        # A snapshot that would crowd out the commands themselves is not worth keeping
+        if size <= self.memory_budget // 2:
+            self._snapshots[self.position] = snapshot
+            self._size += size
+
+    def _clear_redo(self):
+        for command in self._redo:
+            self._size -= self._command_size(command)
+        self._redo.clear()
+        for position in [position for position in self._snapshots if position > self.position]:
+            self._drop_snapshot(position)
+
+    def _drop_snapshot(self, position):
+        snapshot = self._snapshots.pop(position)
+        self._size -= sum(len(content) for content in snapshot.values())
+
+    def _evict(self):
+        while self._size > self.memory_budget and len(self._undo) > 1:
+            evicted = self._undo.popleft()
+            self._size -= self._command_size(evicted)
+            if evicted is self._coalescible:
+                self._coalescible = None
+            self._base += 1
+            for position in [position for position in self._snapshots if position < self._base]:
+                self._drop_snapshot(position)
+
+    def _command_size(self, command):
+        return self.COMMAND_OVERHEAD + sum(
+            len(value) for value in vars(command).values() if isinstance(value, str)
+        )
 
 # Invoker class
 class TextEditor:
-    def __init__(self):
-        self.history = []
-        self.redo_stack = []
+    def __init__(self, history=None):
+        self.history = history if history is not None else CommandHistory()
 
     def execute_command(self, command):
         command.execute()
-        self.history.append(command)
-        self.redo_stack.clear()
+        self.history.push(command)
 
     def undo(self):
-        if not self.history:
+        if not self.history.can_undo():
             print("Nothing to undo")
             return
-        command = self.history.pop()
-        command.undo()
-        self.redo_stack.append(command)
+        self.history.undo()
 
     def redo(self):
-        if not self.redo_stack:
+        if not self.history.can_redo():
             print("Nothing to redo")
             return
-        command = self.redo_stack.pop()
-        command.execute()
-        self.history.append(command)
+        self.history.redo()
+
+    def goto(self, position):
+        self.history.goto(position)
+
+# Runs commands submitted from any thread on a worker pool. Commands for the
+# same receiver (`command.document`) run one at a time in submission order
+# through that document's own TextEditor, so history and undo stay
+# consistent per document, while different documents run in parallel. Each
+# editor keeps its document's history until release() is called for it.
+class CommandScheduler:
+    BATCH_SIZE = 64
+
+    def __init__(self, max_workers=None, history_factory=CommandHistory):
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="command-scheduler")
+        self._history_factory = history_factory
+        self._lanes = {}
+        self._editors = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._shutdown = False
+
+    def editor(self, document):
+        with self._lock:
+            editor = self._editors.get(document)
+            if editor is None:
+                editor = self._editors[document] = TextEditor(self._history_factory())
+            return editor
+
+    def release(self, document):
+        # Drops the document's editor and its history; commands already queued
+        # for it still run, on a fresh editor
+        with self._lock:
+            self._editors.pop(document, None)
+
+    def submit(self, command):
+        return self._schedule(getattr(command, "document", None), lambda editor: editor.execute_command(command))
+
+    def undo(self, document):
+        return self._schedule(document, lambda editor: editor.undo())
+
+    def redo(self, document):
+        return self._schedule(document, lambda editor: editor.redo())
+
+    def _schedule(self, receiver, action):
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new commands after shutdown")
+            lane = self._lanes.get(receiver)
+            idle = lane is None
+            if idle:
+                lane = self._lanes[receiver] = deque()
+            lane.append((future, action))
+        if idle:
+            self._executor.submit(self._drain, receiver)
+        return future
+
+    def _drain(self, receiver):
+        editor = self.editor(receiver)
+        for _ in range(self.BATCH_SIZE):
+            with self._lock:
+                lane = self._lanes.get(receiver)
+                if lane is None:
+                    return  # Cancelled by shutdown(wait=False)
+                if not lane:
+                    del self._lanes[receiver]
+                    if not self._lanes:
+                        self._idle.notify_all()
+                    return
+                future, action = lane.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(action(editor))
+            except BaseException as exc:
+                future.set_exception(exc)
+        # Yield the worker so a busy document cannot starve the others
+        self._executor.submit(self._drain, receiver)
+
+    def shutdown(self, wait=True):
+        with self._idle:
+            self._shutdown = True
+            if wait:
+                # Lanes resubmit themselves, so wait for them to drain before closing the pool
+                self._idle.wait_for(lambda: not self._lanes)
+            else:
+                for lane in self._lanes.values():
+                    for future, _ in lane:
+                        future.cancel()
+                self._lanes.clear()
+        self._executor.shutdown(wait=wait)
 
 if __name__ == "__main__":
-    document = Document()
+    document = Document(echo=True)
     editor = TextEditor()
 
     add_command = AddTextCommand(document, "Hello, ")
@@ -116,3 +621,31 @@ if __name__ == "__main__":
     editor.redo()  
     editor.redo()
     editor.redo() 
+
+    # Keystrokes are coalesced, so a single undo removes the whole word
+    for character in " Bye":
+        editor.execute_command(AddTextCommand(document, character))
+    editor.undo()
+
+    import tempfile
+    with tempfile.TemporaryDirectory() as journal_dir:
+        journal_path = os.path.join(journal_dir, "document.journal")
+        snapshot_path = os.path.join(journal_dir, "document.snapshot")
+        journaled = CommandJournal.recover(journal_path, snapshot_path)
+        journaled_editor = TextEditor()
+        journaled_editor.execute_command(AddTextCommand(journaled, "Durable "))
+        journaled.journal.checkpoint(journaled, snapshot_path)
+        journaled_editor.execute_command(AddTextCommand(journaled, "text"))
+        journaled.journal.close()
+        print(CommandJournal.recover(journal_path, snapshot_path).content)  # Durable text
+
+    scheduler = CommandScheduler(max_workers=4)
+    drafts = [Document(), Document()]
+    futures = [scheduler.submit(AddTextCommand(draft, word)) for word in ("a", "b", "c") for draft in drafts]
+    for future in futures:
+        future.result()
+    scheduler.undo(drafts[0]).result()
+    for draft in drafts:
+        scheduler.release(draft)  # Frees the draft's editor and undo history
+    scheduler.shutdown()
+    print([draft.content for draft in drafts])  # ['', 'abc'] - the coalesced edit is undone as one
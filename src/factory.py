@@ -1,4 +1,4 @@
-from abc import ABC, abstractmethod
+from abc import ABC
 
 """
 # Factory Pattern
@@ -27,45 +27,276 @@ Example in Python (Document reader use-case):
 
 # Document Reader base class
 class DocumentReader(ABC):
-    @abstractmethod
+    # Readers that keep no per-document state opt in to being shared
+    stateless = False
+    # CPU-bound readers are run in a process pool for bulk ingestion
+    cpu_bound = False
+
+    # Subclasses implement stream, read or both; each defaults to the other
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.stream is DocumentReader.stream and cls.read is DocumentReader.read:
+            raise TypeError(f"{cls.__name__} must override stream() or read()")
+
+    def stream(self, filepath):
+        yield self.read(filepath)
+
     def read(self, filepath):
-        pass
+        return "".join(self.stream(filepath))
 
 # Concrete Document Readers
 class PDFReader(DocumentReader):
-    def read(self, filepath):
-        return f"Reading PDF file: {filepath}"
+    stateless = True
+    cpu_bound = True
+
+    # Yields the text of one page at a time; needs the optional pypdf package
+    def stream(self, filepath):
+        try:
+            from pypdf import PdfReader
+        except ImportError as e:
+            raise ImportError("PDFReader requires the 'pypdf' package") from e
+        for page in PdfReader(filepath).pages:
+            yield page.extract_text() + "\n"
 
 class WordReader(DocumentReader):
-    def read(self, filepath):
-        return f"Reading Word file: {filepath}"
+    # Streams paragraphs out of a .docx archive without building the whole XML tree
+    stateless = True
+    cpu_bound = True
+    NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+    def stream(self, filepath):
+        import zipfile
+        from xml.etree.ElementTree import iterparse
+        paragraph, text = self.NAMESPACE + "p", self.NAMESPACE + "t"
+        with zipfile.ZipFile(filepath) as archive, archive.open("word/document.xml") as xml:
+            parts = []
+            for _, element in iterparse(xml, events=("end",)):
+                if element.tag == text:
+                    parts.append(element.text or "")
+                elif element.tag == paragraph:
+                    yield "".join(parts) + "\n"
+                    parts.clear()
+                    element.clear()
 
 class TextReader(DocumentReader):
-    def read(self, filepath):
-        return f"Reading Text file: {filepath}"
+    # Decodes a memory-mapped file incrementally in `chunk_size` byte chunks,
+    # yielding text chunks or, with lines=True, whole lines. With no encoding
+    # given, it is detected from a byte order mark or a sample of the file.
+    stateless = True
+    SAMPLE_SIZE = 64 * 1024
+
+    def __init__(self, chunk_size=1 << 20, encoding=None, lines=False):
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.lines = lines
+
+    def stream(self, filepath):
+        chunks = self._chunks(filepath)
+        return self._lines(chunks) if self.lines else chunks
+
+    def _chunks(self, filepath):
+        import codecs
+        import mmap
+        with open(filepath, "rb") as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return  # Empty files cannot be mapped
+            with data:
+                encoding = self.encoding or self.detect_encoding(data[:self.SAMPLE_SIZE],
+                                                                 truncated=len(data) > self.SAMPLE_SIZE)
+                decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+                for start in range(0, len(data), self.chunk_size):
+                    text = decoder.decode(data[start:start + self.chunk_size])
+                    if text:
+                        yield text
+                tail = decoder.decode(b"", final=True)
+                if tail:
+                    yield tail
+
+    @staticmethod
+    def _lines(chunks):
+        pending = ""
+        for chunk in chunks:
+            lines = (pending + chunk).splitlines(keepends=True)
+            # Hold back the last line unless it is complete; a trailing \r may be half of \r\n
+            pending = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+            yield from lines
+        if pending:
+            yield pending
+
+    @staticmethod
+    def detect_encoding(sample, truncated=False):
+        import codecs
+        if sample.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+        try:
+            sample.decode("utf-8")
+        except UnicodeDecodeError as e:
+            # A multi-byte sequence cut off where the sample was truncated is still UTF-8
+            if not truncated or e.start < len(sample) - 3:
+                return "latin-1"
+        return "utf-8"
 
 # Factory class
 class DocumentReaderFactory:
+    # Readers are registered per file type, either as a class or as an
+    # "module:ClassName" import path that is only imported the first time the
+    # type is requested. Readers marked stateless are created once and shared.
+    _registry = {}
+    _extensions = {}
+    _instances = {}
+
+    @classmethod
+    def register(cls, filetype, reader, extensions=()):
+        cls._registry[filetype] = reader
+        cls._instances.pop(filetype, None)
+        for extension in extensions:
+            cls._extensions[extension.lower().lstrip(".")] = filetype
+
+    @classmethod
+    def filetype_for(cls, filepath):
+        import os
+        extension = os.path.splitext(filepath)[1].lower().lstrip(".")
+        try:
+            return cls._extensions[extension]
+        except KeyError:
+            raise ValueError(f"Unsupported file extension: {filepath}") from None
+
+    @classmethod
+    def get_document_reader(cls, filetype):
+        reader = cls._instances.get(filetype)
+        if reader is not None:
+            return reader
+        try:
+            reader_class = cls._registry[filetype]
+        except KeyError:
+            raise ValueError(f"Unsupported file type: {filetype}") from None
+        if isinstance(reader_class, str):
+            reader_class = cls._registry[filetype] = cls._load(reader_class)
+        reader = reader_class()
+        if getattr(reader_class, "stateless", False):
+            cls._instances[filetype] = reader
+        return reader
+
     @staticmethod
-    def get_document_reader(filetype):
-        if filetype == "pdf":
-            return PDFReader()
-        elif filetype == "word":
-            return WordReader()
-        elif filetype == "text":
-            return TextReader()
-        else:
-            raise ValueError(f"Unsupported file type: {filetype}")
+    def _load(import_path):
+        import importlib
+        module_name, _, class_name = import_path.partition(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
+DocumentReaderFactory.register("pdf", PDFReader, extensions=("pdf",))
+DocumentReaderFactory.register("word", WordReader, extensions=("docx",))
+DocumentReaderFactory.register("text", TextReader, extensions=("txt", "text", "log", "md", "csv"))
 
 # Usage
-def read_document(filepath, filetype):
+def read_document(filepath, filetype=None):
+    filetype = filetype or DocumentReaderFactory.filetype_for(filepath)
     reader = DocumentReaderFactory.get_document_reader(filetype)
     return reader.read(filepath)
 
+def read_document_stream(filepath, filetype=None):
+    filetype = filetype or DocumentReaderFactory.filetype_for(filepath)
+    reader = DocumentReaderFactory.get_document_reader(filetype)
+    return reader.stream(filepath)
+
+# Module level so the process pool can pickle it. Takes the resolved reader
+# class rather than a file type: spawn and forkserver workers start with only
+# the built-in registrations, so readers registered at runtime are unknown there.
+# Reads a whole batch per call so the pool's IPC cost is paid once per batch.
+def _read_files(reader_class, filepaths):
+    reader = reader_class()
+    results = []
+    for filepath in filepaths:
+        try:
+            results.append((filepath, reader.read(filepath), None))
+        except Exception as e:
+            results.append((filepath, None, e))
+    return results
+
+def _expand_paths(source):
+    import glob
+    import os
+    if isinstance(source, (str, os.PathLike)):
+        source = os.fspath(source)
+        if os.path.isdir(source):
+            for root, _, filenames in os.walk(source):
+                for filename in sorted(filenames):
+                    yield os.path.join(root, filename)
+        else:
+            yield from glob.iglob(source, recursive=True)
+    else:
+        yield from source
+
+def read_documents(source, max_in_flight=64, process_workers=None, thread_workers=None, batch_size=32):
+    # Reads a directory, glob pattern or iterable of paths in parallel and
+    # yields (filepath, content, error) tuples as each file finishes. CPU-bound
+    # readers run in a process pool, which is sent files in batches of up to
+    # `batch_size` per reader; the rest run in a thread pool one file at a
+    # time. At most about `max_in_flight` files are read at once.
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+    pending = {}  # future -> (file paths, whether it is a batch)
+    batches = {}  # reader class -> file paths not yet sent to the process pool
+    in_flight = 0
+    with ProcessPoolExecutor(process_workers) as processes, ThreadPoolExecutor(thread_workers) as threads:
+        for filepath in _expand_paths(source):
+            try:
+                filetype = DocumentReaderFactory.filetype_for(filepath)
+                reader = DocumentReaderFactory.get_document_reader(filetype)
+            except (ValueError, ImportError) as e:
+                yield filepath, None, e
+                continue
+            if reader.cpu_bound:
+                batch = batches.setdefault(type(reader), [])
+                batch.append(filepath)
+                if len(batch) < batch_size:
+                    continue
+                del batches[type(reader)]
+                pending[processes.submit(_read_files, type(reader), batch)] = (batch, True)
+                in_flight += len(batch)
+            else:
+                pending[threads.submit(reader.read, filepath)] = ((filepath,), False)
+                in_flight += 1
+            while in_flight >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for result in _collect(done, pending):
+                    in_flight -= 1
+                    yield result
+        for reader_class, batch in batches.items():
+            pending[processes.submit(_read_files, reader_class, batch)] = (batch, True)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from _collect(done, pending)
+
+def _collect(done, pending):
+    for future in done:
+        filepaths, batched = pending.pop(future)
+        error = future.exception()
+        if error is not None:
+            for filepath in filepaths:
+                yield filepath, None, error
+        elif batched:
+            yield from future.result()
+        else:
+            yield filepaths[0], future.result(), None
+
 if __name__=="__main__":
-    try:
-        print(read_document("document.pdf", "pdf"))   # Reading PDF file: document.pdf
-        print(read_document("document.docx", "word")) # Reading Word file: document.docx
-        print(read_document("document.txt", "text"))  # Reading Text file: document.txt
-    except ValueError as e:
-        print(e)
\ No newline at end of file
+    import os
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, "document.txt")
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write("First line\nSecond line\n")
+        try:
+            print(read_document(filepath, "text"))         # First line, Second line
+            for chunk in read_document_stream(filepath, "text"):
+                print(f"Chunk of {len(chunk)} characters")
+            print(read_document(filepath))                 # File type detected from the extension
+            print(read_document(filepath, "spreadsheet"))  # Unsupported file type: spreadsheet
+        except ValueError as e:
+            print(e)
+
+        for path, content, error in read_documents(directory):
+            print(path, error or f"{len(content)} characters")
@@ -1,4 +1,9 @@
 from abc import ABC, abstractmethod
+import json
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
 
 """
 # Mediator Pattern
@@ -59,18 +64,200 @@ class Mediator(ABC):
     def send_message(self, message, colleague):
         pass
 
+# Fans a message out to one shard of recipients on a pool thread
+def _deliver(recipients, message):
+    for user in recipients:
+        user.receive(message)
+
+
+# Per-room message history kept in fixed-size ring buffers, one memory-mapped
+# file per room. Each file holds a header followed by `capacity` slots of
+# `slot_size` bytes, so disk and memory use never grow, and history survives
+# restarts without being reloaded into Python objects. str messages are stored
+# as UTF-8 and anything else as JSON; a message that does not fit in a slot is
+# rejected with ValueError. Rooms that are not str are keyed by their repr.
+class MessageHistory:
+    HEADER = struct.Struct("<8sIIQ")  # magic, capacity, slot_size, messages written
+    LENGTH = struct.Struct("<I")
+    JSON_FLAG = 1 << 31  # Set in a slot's length when the payload is JSON
+    MAGIC = b"CHATHIST"
+
+    def __init__(self, directory, capacity=1000, slot_size=512):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self._buffers = {}
+
+    def _path(self, room):
+        name = room if isinstance(room, str) else repr(room)
+        return os.path.join(self.directory, name.encode("utf-8").hex() + ".hist")
+
+    def _buffer(self, room):
+        buffer = self._buffers.get(room)
+        if buffer is None:
+            path = self._path(room)
+            size = self.HEADER.size + self.capacity * self.slot_size
+            exists = os.path.exists(path)
+            with open(path, "r+b" if exists else "w+b") as f:
+                if not exists:
+                    f.truncate(size)
+                buffer = mmap.mmap(f.fileno(), 0)
+            if not exists:
+                self.HEADER.pack_into(buffer, 0, self.MAGIC, self.capacity, self.slot_size, 0)
+            magic, capacity, slot_size, _ = self.HEADER.unpack_from(buffer, 0)
+            if magic != self.MAGIC or (capacity, slot_size) != (self.capacity, self.slot_size):
+                buffer.close()
+                raise ValueError(f"History file {path} does not match capacity={self.capacity}, "
+                                 f"slot_size={self.slot_size}")
+            self._buffers[room] = buffer
+        return buffer
+
+    def encode(self, message):
+        # Returns the record `write` stores, so a message can be checked once
+        # and written to several rooms
+        if isinstance(message, str):
+            data, flag = message.encode("utf-8"), 0
+        else:
+            data, flag = json.dumps(message, separators=(",", ":")).encode("utf-8"), self.JSON_FLAG
+        if len(data) > self.slot_size - self.LENGTH.size:
+            raise ValueError(f"Message of {len(data)} bytes does not fit in a {self.slot_size} byte history slot")
+        return data, flag
+
+    def append(self, room, message):
+        self.write(room, self.encode(message))
+
+    def write(self, room, record):
+        data, flag = record
+        buffer = self._buffer(room)
+        written = self.HEADER.unpack_from(buffer, 0)[3]
+        offset = self.HEADER.size + (written % self.capacity) * self.slot_size
+        self.LENGTH.pack_into(buffer, offset, len(data) | flag)
+        buffer[offset + self.LENGTH.size:offset + self.LENGTH.size + len(data)] = data
+        # The counter is bumped only after the slot is complete
+        self.HEADER.pack_into(buffer, 0, self.MAGIC, self.capacity, self.slot_size, written + 1)
+
+    def last(self, room, n):
+        buffer = self._buffer(room)
+        written = self.HEADER.unpack_from(buffer, 0)[3]
+        for index in range(max(0, written - min(n, self.capacity)), written):
+            offset = self.HEADER.size + (index % self.capacity) * self.slot_size
+            (length,) = self.LENGTH.unpack_from(buffer, offset)
+            start = offset + self.LENGTH.size
+            data = buffer[start:start + (length & ~self.JSON_FLAG)]
+            yield json.loads(data) if length & self.JSON_FLAG else data.decode("utf-8")
+
+    def flush(self):
+        for buffer in self._buffers.values():
+            buffer.flush()
+
+    def close(self):
+        for buffer in self._buffers.values():
+            buffer.flush()
+            buffer.close()
+        self._buffers.clear()
+
+
 # Concrete Mediator
 class ChatMediator(Mediator):
-    def __init__(self):
-        self.users = []
+    # Members are indexed per room in insertion-ordered dicts, so joining and
+    # leaving are O(1) and duplicates are ignored. Rooms larger than
+    # `parallel_threshold` are split into shards of `shard_size` and delivered
+    # through `executor` when one is given. The executor must be a thread pool:
+    # users hold their mediator and cannot be sent to another process. With a
+    # MessageHistory, each joining user is replayed the last `replay_count`
+    # messages of the room. A sender outside every room broadcasts to the
+    # default room, as before rooms existed.
+    DEFAULT_ROOM = "lobby"
+
+    def __init__(self, executor=None, parallel_threshold=10_000, shard_size=5_000, history=None,
+                 replay_count=50):
+        if isinstance(executor, ProcessPoolExecutor):
+            raise TypeError("ChatMediator fan-out needs a thread pool; users cannot be pickled to other processes")
+        self.rooms = {}
+        self.memberships = {}
+        self._recipients = {}
+        self.executor = executor
+        self.parallel_threshold = parallel_threshold
+        self.shard_size = shard_size
+        self.history = history
+        self.replay_count = replay_count
+
+    @property
+    def users(self):
+        return list(self.memberships)
+
+    def add_user(self, user, room=DEFAULT_ROOM):
+        self.join(user, room)
+
+    def remove_user(self, user):
+        for room in list(self.memberships.get(user, ())):
+            self.leave(user, room)
+
+    def join(self, user, room=DEFAULT_ROOM):
+        members = self.rooms.setdefault(room, {})
+        if user not in members:
+            members[user] = None
+            self.memberships.setdefault(user, {})[room] = None
+            self._recipients.pop(room, None)
+            if self.history is not None:
+                self.replay(user, room)
 
-    def add_user(self, user):
-        self.users.append(user)
+    def replay(self, user, room=DEFAULT_ROOM, count=None):
+        count = self.replay_count if count is None else count
+        for message in self.history.last(room, count):
+            user.receive(message)
 
-    def send_message(self, message, sender):
-        for user in self.users:
-            if user != sender:
-                user.receive(message)
+    def leave(self, user, room=DEFAULT_ROOM):
+        members = self.rooms.get(room)
+        if members is None or user not in members:
+            return
+        del members[user]
+        self._recipients.pop(room, None)
+        if not members:
+            del self.rooms[room]
+        rooms = self.memberships[user]
+        del rooms[room]
+        if not rooms:
+            del self.memberships[user]
+
+    def members(self, room=DEFAULT_ROOM):
+        # Cached snapshot, rebuilt only after the room membership changes
+        recipients = self._recipients.get(room)
+        if recipients is None:
+            recipients = self._recipients[room] = tuple(self.rooms.get(room, ()))
+        return recipients
+
+    def send_message(self, message, sender, room=None):
+        rooms = [room] if room is not None else list(self.memberships.get(sender, ()))
+        if not rooms:
+            rooms = [self.DEFAULT_ROOM]
+        if self.history is not None:
+            # Encoded up front so a message history cannot store is rejected
+            # before anything is recorded or delivered
+            record = self.history.encode(message)
+            for history_room in rooms:
+                self.history.write(history_room, record)
+        if len(rooms) == 1:
+            return self._broadcast(self.members(rooms[0]), message, sender)
+        # A user sharing several rooms with the sender receives the message once
+        recipients = {}
+        for room in rooms:
+            recipients.update(dict.fromkeys(self.members(room)))
+        self._broadcast(tuple(recipients), message, sender)
+
+    def _broadcast(self, members, message, sender):
+        if self.executor is None or len(members) < self.parallel_threshold:
+            for user in members:
+                if user is not sender:
+                    user.receive(message)
+            return
+        futures = []
+        for start in range(0, len(members), self.shard_size):
+            shard = [user for user in members[start:start + self.shard_size] if user is not sender]
+            futures.append(self.executor.submit(_deliver, shard, message))
+        for future in futures:
+            future.result()
 
 if __name__ == "__main__":
     mediator = ChatMediator()
@@ -85,3 +272,21 @@ if __name__ == "__main__":
 
     user1.send("Hello everyone!")  # User1 sends: Hello everyone!, User2 receives: Hello everyone!, User3 receives: Hello everyone!
     user2.send("Hi User1!")        # User2 sends: Hi User1!, User1 receives: Hi User1!, User3 receives: Hi User1!
+
+    mediator.join(user1, "support")
+    mediator.join(user3, "support")
+    mediator.send_message("Support room only", user1, room="support")  # User3 receives: Support room only
+
+    mediator.remove_user(user2)
+    user1.send("Bye User2!")       # User1 sends: Bye User2!, User3 receives: Bye User2!
+
+    import tempfile
+    with tempfile.TemporaryDirectory() as history_dir:
+        history_mediator = ChatMediator(history=MessageHistory(history_dir, capacity=100), replay_count=2)
+        alice = User(history_mediator, "Alice")
+        history_mediator.add_user(alice)
+        alice.send("First")
+        alice.send("Second")
+        alice.send("Third")
+        history_mediator.add_user(User(history_mediator, "Bob"))  # Bob receives: Second, Bob receives: Third
+        history_mediator.history.close()
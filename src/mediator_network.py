@@ -0,0 +1,264 @@
+
+"""
+# Networked Mediator
+
+Runs the chat mediator from `mediator.py` as an asyncio server so that `Colleague`s can
+connect over TCP or Unix sockets.
+
+Every frame is a 4-byte big-endian length prefix followed by a UTF-8 JSON payload. Outgoing
+frames are queued per connection and written with a single `writelines` call per event loop
+tick, so a burst of broadcasts costs one syscall per connection instead of one per message.
+A connection whose queue grows past `MAX_PENDING` bytes is reading too slowly to keep up and
+is disconnected rather than left to grow the server's memory without bound.
+
+**Usage (local load test):**
+python mediator_network.py --clients 20 --messages 500
+python mediator_network.py --unix /tmp/chat.sock
+"""
+
+import argparse
+import asyncio
+import json
+import struct
+import time
+
+from mediator import Colleague, Mediator
+
+HEADER = struct.Struct("!I")
+MAX_FRAME = 16 * 1024 * 1024
+MAX_PENDING = 64 * 1024 * 1024
+
+
+def encode_frame(payload):
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(len(data)) + data
+
+
+async def read_frame(reader):
+    header = await reader.readexactly(HEADER.size)
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME} byte limit")
+    return json.loads(await reader.readexactly(length))
+
+
+# Batches the frames written to one stream into a single write per loop tick.
+# The stream is closed once more than `max_pending` bytes are waiting to be
+# written, so one stalled peer cannot hold an unbounded backlog.
+class FrameWriter:
+    def __init__(self, writer, max_pending=MAX_PENDING):
+        self._writer = writer
+        self._max_pending = max_pending
+        self._pending = []
+        self._pending_bytes = 0
+        self._flush_task = None
+
+    def write(self, payload):
+        if self._writer.is_closing():
+            return
+        frame = encode_frame(payload)
+        self._pending.append(frame)
+        self._pending_bytes += len(frame)
+        if self._pending_bytes > self._max_pending:
+            self._pending.clear()
+            self._pending_bytes = 0
+            self._writer.transport.abort()
+            return
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self):
+        try:
+            while self._pending and not self._writer.is_closing():
+                frames, self._pending = self._pending, []
+                self._pending_bytes = 0
+                self._writer.writelines(frames)
+                await self._writer.drain()
+        except ConnectionError:
+            self._pending.clear()
+            self._pending_bytes = 0
+        finally:
+            self._flush_task = None
+
+    async def close(self):
+        if self._flush_task is not None:
+            await self._flush_task
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+# Server-side stand-in for a client connected over the network
+class RemoteColleague(Colleague):
+    def __init__(self, mediator, name, frame_writer):
+        super().__init__(mediator, name)
+        self.frame_writer = frame_writer
+
+    def send(self, message):
+        self.mediator.send_message(message, self)
+
+    def receive(self, message):
+        self.frame_writer.write(message)
+
+
+# Concrete Mediator served over asyncio streams
+class NetworkChatMediator(Mediator):
+    def __init__(self):
+        self.colleagues = {}
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for colleague in list(self.colleagues):
+            await colleague.frame_writer.close()
+        self.colleagues.clear()
+
+    def send_message(self, message, colleague):
+        for other in self.colleagues:
+            if other is not colleague:
+                other.receive(message)
+
+    async def _handle_connection(self, reader, writer):
+        colleague = None
+        frame_writer = FrameWriter(writer)
+        try:
+            hello = await read_frame(reader)
+            colleague = RemoteColleague(self, hello["name"], frame_writer)
+            self.colleagues[colleague] = None
+            while True:
+                colleague.send(await read_frame(reader))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if colleague is not None:
+                self.colleagues.pop(colleague, None)
+            await frame_writer.close()
+
+
+# Client-side mediator: forwards a local colleague's messages to the server
+class NetworkClient(Mediator):
+    def __init__(self):
+        self.colleague = None
+        self._frame_writer = None
+        self._reader_task = None
+
+    async def connect(self, colleague, host="127.0.0.1", port=None, path=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        self.colleague = colleague
+        self._frame_writer = FrameWriter(writer)
+        self._frame_writer.write({"name": colleague.name})
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_loop(reader))
+
+    def send_message(self, message, colleague):
+        self._frame_writer.write(message)
+
+    async def _read_loop(self, reader):
+        try:
+            while True:
+                self.colleague.receive(await read_frame(reader))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def close(self):
+        await self._frame_writer.close()
+        self._reader_task.cancel()
+        await asyncio.gather(self._reader_task, return_exceptions=True)
+
+
+# Concrete Colleague used by the load generator; records delivery latency
+class LoadTestUser(Colleague):
+    def __init__(self, mediator, name, expected):
+        super().__init__(mediator, name)
+        self.latencies = []
+        self.expected = expected
+        self.done = asyncio.Event()
+        if expected == 0:
+            self.done.set()
+
+    def send(self, message):
+        self.mediator.send_message({"from": self.name, "text": message, "sent": time.perf_counter()}, self)
+
+    def receive(self, message):
+        self.latencies.append(time.perf_counter() - message["sent"])
+        if len(self.latencies) >= self.expected:
+            self.done.set()
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+async def run_load_test(clients=10, messages=1000, payload_size=64, path=None, timeout=60):
+    mediator = NetworkChatMediator()
+    address = await mediator.start(path=path)
+    port = None if path is not None else address[1]
+
+    users = []
+    for i in range(clients):
+        client = NetworkClient()
+        user = LoadTestUser(client, f"client-{i}", expected=messages * (clients - 1))
+        await client.connect(user, port=port, path=path)
+        users.append(user)
+    while len(mediator.colleagues) < clients:
+        await asyncio.sleep(0.001)
+
+    text = "x" * payload_size
+    start = time.perf_counter()
+    for _ in range(messages):
+        for user in users:
+            user.send(text)
+        # Yield so the batched writers can flush between rounds
+        await asyncio.sleep(0)
+    await asyncio.wait_for(asyncio.gather(*(user.done.wait() for user in users)), timeout)
+    elapsed = time.perf_counter() - start
+
+    for user in users:
+        await user.mediator.close()
+    await mediator.stop()
+
+    latencies = [latency for user in users for latency in user.latencies]
+    return {
+        "transport": "unix" if path is not None else "tcp",
+        "clients": clients,
+        "messages_per_client": messages,
+        "sent": clients * messages,
+        "delivered": len(latencies),
+        "elapsed_s": elapsed,
+        "messages_per_s": len(latencies) / elapsed if elapsed else None,
+        "latency_ms": {
+            f"p{pct}": _percentile(latencies, pct) * 1000 for pct in (50, 90, 99)
+        } if latencies else {},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local throughput benchmark for NetworkChatMediator.")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=1000, help="Messages sent by each client")
+    parser.add_argument("--payload-size", type=int, default=64)
+    parser.add_argument("--unix", metavar="PATH", help="Use a Unix socket at PATH instead of TCP")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load_test(args.clients, args.messages, args.payload_size, args.unix))
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -25,10 +25,17 @@ Distributed event-driven systems.
 **Example in Python (Event handling system use-case):**
 """
 
+import threading
+
+
 class Observer:
     def update(self, message):
         pass
 
+    def update_batch(self, messages):
+        for message in messages:
+            self.update(message)
+
 
 class Subject:
     def __init__(self):
@@ -45,11 +52,222 @@ class Subject:
             observer.update(message)
 
 
+class BatchingSubject(Subject):
+    # Collects messages published within a window of `max_messages` messages or
+    # `max_delay_ms` milliseconds and hands them to each observer in a single
+    # update_batch call. With a `key` function, a newer message replaces any
+    # pending message with the same key so only the latest one is delivered.
+    def __init__(self, max_messages=100, max_delay_ms=50, key=None):
+        super().__init__()
+        self._max_messages = max_messages
+        self._max_delay = max_delay_ms / 1000
+        self._key = key
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Held from taking a batch until it is delivered so batches reach
+        # observers in publish order; re-entrant so an observer may publish
+        self._delivery_lock = threading.RLock()
+        self._timer = None
+        self._generation = 0
+
+    def notify_observers(self, message):
+        with self._lock:
+            key = self._key(message) if self._key else None
+            if key is None:
+                key = object()
+            # Re-inserting moves a superseded key to the end, keeping publish order
+            self._pending.pop(key, None)
+            self._pending[key] = message
+            if len(self._pending) < self._max_messages:
+                if self._timer is None:
+                    self._timer = threading.Timer(self._max_delay, self._expire, args=(self._generation,))
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        self._flush(None)
+
+    def _expire(self, generation):
+        self._flush(generation)
+
+    def _flush(self, generation):
+        with self._delivery_lock:
+            with self._lock:
+                # A timer that fires after its batch was already flushed must
+                # leave the timer started for the next batch alone
+                if generation is not None and generation != self._generation:
+                    return
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                self._generation += 1
+                messages = list(self._pending.values())
+                self._pending.clear()
+            if messages:
+                for observer in list(self._observers):
+                    observer.update_batch(messages)
+
+
+class TopicSubject:
+    # Subscriptions are indexed by topic so a notification only visits the
+    # observers of that topic. Observers are held through weak references and
+    # are dropped automatically once they are garbage collected.
+    def __init__(self):
+        self._topics = {}
+
+    def register_observer(self, observer, topic=None):
+        import weakref
+        observers = self._topics.setdefault(topic, weakref.WeakKeyDictionary())
+        observers[observer] = None
+
+    def unregister_observer(self, observer, topic=None):
+        observers = self._topics.get(topic)
+        if observers is not None:
+            observers.pop(observer, None)
+            if not observers:
+                del self._topics[topic]
+
+    def notify_observers(self, message, topic=None):
+        observers = self._topics.get(topic)
+        if observers:
+            for observer in list(observers.keys()):
+                observer.update(message)
+
+    def topics(self):
+        return [topic for topic, observers in self._topics.items() if observers]
+
+
+class AsyncSubject:
+    # Delivers notifications to coroutine observers concurrently. Each observer
+    # is drained by its own task from a bounded queue, so a slow observer only
+    # builds up its own backlog; the overflow policy decides what happens when
+    # that backlog is full.
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+
+    class _Subscription:
+        def __init__(self, observer, maxsize, policy):
+            import asyncio
+            self.observer = observer
+            self.policy = policy
+            self.queue = asyncio.Queue(maxsize)
+            self.delivered = 0
+            self.dropped = 0
+            self.errors = 0
+            self.task = None
+            # Publishers' puts still waiting for room under the BLOCK policy
+            self.waiting = set()
+
+        def cancel(self):
+            # Fails the waiting puts too, otherwise their publishers would wait
+            # forever on a queue nobody drains any more
+            self.task.cancel()
+            for put in list(self.waiting):
+                put.cancel()
+
+    def __init__(self, maxsize=1000, policy=BLOCK):
+        self._maxsize = maxsize
+        self._policy = policy
+        self._subscriptions = {}
+
+    def register_observer(self, observer, maxsize=None, policy=None):
+        import asyncio
+        if observer in self._subscriptions:
+            return
+        policy = policy or self._policy
+        if policy not in (self.BLOCK, self.DROP_OLDEST, self.DROP_NEWEST):
+            raise ValueError(f"Unsupported overflow policy: {policy}")
+        subscription = self._Subscription(observer, maxsize or self._maxsize, policy)
+        subscription.task = asyncio.get_running_loop().create_task(self._drain(subscription))
+        self._subscriptions[observer] = subscription
+
+    def unregister_observer(self, observer):
+        subscription = self._subscriptions.pop(observer, None)
+        if subscription is not None:
+            subscription.cancel()
+
+    async def notify_observers(self, message):
+        import asyncio
+        blocked = []
+        for subscription in self._subscriptions.values():
+            queue = subscription.queue
+            if not queue.full():
+                queue.put_nowait(message)
+            elif subscription.policy == self.DROP_NEWEST:
+                subscription.dropped += 1
+            elif subscription.policy == self.DROP_OLDEST:
+                queue.get_nowait()
+                queue.task_done()
+                queue.put_nowait(message)
+                subscription.dropped += 1
+            else:
+                put = asyncio.ensure_future(queue.put(message))
+                subscription.waiting.add(put)
+                put.add_done_callback(subscription.waiting.discard)
+                blocked.append(put)
+        if blocked:
+            # Puts cancelled by unregister_observer must not fail the publisher
+            await asyncio.gather(*blocked, return_exceptions=True)
+
+    async def _drain(self, subscription):
+        import inspect
+        queue = subscription.queue
+        while True:
+            message = await queue.get()
+            try:
+                result = subscription.observer.update(message)
+                if inspect.isawaitable(result):
+                    await result
+                subscription.delivered += 1
+            except Exception:
+                # A failing observer must not stop its own delivery loop
+                subscription.errors += 1
+            finally:
+                queue.task_done()
+
+    def stats(self):
+        return {
+            observer: {
+                "lag": subscription.queue.qsize(),
+                "delivered": subscription.delivered,
+                "dropped": subscription.dropped,
+                "errors": subscription.errors,
+            }
+            for observer, subscription in self._subscriptions.items()
+        }
+
+    async def join(self):
+        for subscription in list(self._subscriptions.values()):
+            await subscription.queue.join()
+
+    async def close(self):
+        import asyncio
+        await self.join()
+        subscriptions = list(self._subscriptions.values())
+        self._subscriptions.clear()
+        for subscription in subscriptions:
+            subscription.cancel()
+        await asyncio.gather(*(subscription.task for subscription in subscriptions), return_exceptions=True)
+
+
 class ConcreteObserver(Observer):
     def update(self, message):
         print(f"Received message: {message}")
 
 
+class BatchConcreteObserver(Observer):
+    def update_batch(self, messages):
+        print(f"Received {len(messages)} messages: {messages}")
+
+
+class AsyncConcreteObserver(Observer):
+    async def update(self, message):
+        print(f"Received message asynchronously: {message}")
+
+
 if __name__=="__main__":
     subject = Subject()
     observer1 = ConcreteObserver()
@@ -59,3 +277,26 @@ if __name__=="__main__":
     subject.register_observer(observer2)
 
     subject.notify_observers("Event occurred")
+
+    topic_subject = TopicSubject()
+    topic_subject.register_observer(observer1, "orders")
+    topic_subject.register_observer(observer2, "payments")
+
+    topic_subject.notify_observers("Order placed", "orders")  # Only observer1 receives it
+
+    batching_subject = BatchingSubject(max_messages=3, key=lambda message: message["symbol"])
+    batching_subject.register_observer(BatchConcreteObserver())
+    batching_subject.notify_observers({"symbol": "ABC", "price": 1})
+    batching_subject.notify_observers({"symbol": "XYZ", "price": 7})
+    batching_subject.notify_observers({"symbol": "ABC", "price": 2})  # Replaces the pending ABC price
+    batching_subject.flush()  # Received 2 messages
+
+    import asyncio
+
+    async def async_example():
+        async_subject = AsyncSubject(maxsize=10, policy=AsyncSubject.DROP_OLDEST)
+        async_subject.register_observer(AsyncConcreteObserver())
+        await async_subject.notify_observers("Async event occurred")
+        await async_subject.close()
+
+    asyncio.run(async_example())
@@ -1,4 +1,11 @@
+import copy
+import logging
+import os
+import struct
+import threading
+from types import MappingProxyType
 
+logger = logging.getLogger(__name__)
 
 """
 # Singleton Pattern
@@ -26,34 +33,375 @@ Connection pool.
 """
 
 class SingletonMeta(type):
+    # Double-checked locking: once the instance exists, lookups take no lock.
+    # Each class gets its own lock, so a singleton whose __init__ creates
+    # another singleton does not wait on itself.
     _instances = {}
+    _locks = {}
+    _lock = threading.Lock()
+
+    def _class_lock(cls):
+        lock = SingletonMeta._locks.get(cls)
+        if lock is None:
+            with SingletonMeta._lock:
+                lock = SingletonMeta._locks.setdefault(cls, threading.RLock())
+        return lock
 
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            instance = super().__call__(*args, **kwargs)
-            cls._instances[cls] = instance
-        return cls._instances[cls]
+        instance = cls._instances.get(cls)
+        if instance is None:
+            with cls._class_lock():
+                instance = cls._instances.get(cls)
+                if instance is None:
+                    instance = super().__call__(*args, **kwargs)
+                    cls._instances[cls] = instance
+        return instance
+
+
+class SharedConfigStore:
+    # Publishes a config into shared memory once for every process. Each
+    # version lives in its own segment: an index of key -> (offset, length)
+    # followed by the marshalled values. A small control segment holds the
+    # current version, so readers only check one integer per lookup and decode
+    # just the values they ask for, straight out of the shared buffer. Assumes
+    # a single writer process. Decoded values are cached only when immutable;
+    # lists, dicts and sets are decoded again on every get() so a caller that
+    # mutates one cannot change what later readers see, at the cost of
+    # re-decoding them.
+    VERSION = struct.Struct("<Q")
+    INDEX_LENGTH = struct.Struct("<Q")
+    MAX_ATTACH_ATTEMPTS = 100
+    # Segments whose resource tracker entry belongs to the owner: those this
+    # process created, and all of them in a fork child, which shares its
+    # parent's tracker
+    _created = set()
+    _shares_parent_tracker = False
+    IMMUTABLE = (type(None), bool, int, float, complex, str, bytes)
+
+    def __init__(self, name, create=False):
+        from multiprocessing import shared_memory
+        self.name = name
+        if create:
+            self._control = shared_memory.SharedMemory(name=name, create=True, size=self.VERSION.size)
+            self._created.add(name)
+            self.VERSION.pack_into(self._control.buf, 0, 0)
+        else:
+            self._control = self._attach(name)
+        self._owner = create
+        self._segment = None
+        self._version = 0
+        self._index = {}
+        self._values = {}
+
+    @classmethod
+    def _attach(cls, name):
+        from multiprocessing import resource_tracker, shared_memory
+        # Attaching must not let this process's resource tracker unlink the
+        # segment on exit. Python 3.13+ can opt out explicitly; before that,
+        # attaching registers the segment, so it is unregistered again unless
+        # the entry is the owner's own.
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            segment = shared_memory.SharedMemory(name=name)
+            if name not in cls._created and not cls._shares_parent_tracker:
+                resource_tracker.unregister(segment._name, "shared_memory")
+            return segment
+
+    @classmethod
+    def _after_fork(cls):
+        from multiprocessing import resource_tracker
+        cls._shares_parent_tracker = resource_tracker._resource_tracker._fd is not None
+
+    def _segment_name(self, version):
+        return f"{self.name}-{version}"
+
+    def publish(self, config):
+        import marshal
+        from multiprocessing import shared_memory
+        if not self._owner:
+            raise RuntimeError(f"Shared config '{self.name}' can only be updated by the process sharing it")
+        index, blobs, offset = {}, [], 0
+        for key, value in config.items():
+            blob = marshal.dumps(value)
+            index[key] = (offset, len(blob))
+            blobs.append(blob)
+            offset += len(blob)
+        index_blob = marshal.dumps(index)
+        size = self.INDEX_LENGTH.size + len(index_blob) + offset
+        version = self.current_version() + 1
+        segment = shared_memory.SharedMemory(name=self._segment_name(version), create=True, size=max(size, 1))
+        self._created.add(segment.name)
+        self.INDEX_LENGTH.pack_into(segment.buf, 0, len(index_blob))
+        start = self.INDEX_LENGTH.size
+        segment.buf[start:start + len(index_blob)] = index_blob
+        start += len(index_blob)
+        segment.buf[start:start + offset] = b"".join(blobs)
+        # Switching the version is what makes the new segment visible to readers
+        self.VERSION.pack_into(self._control.buf, 0, version)
+        previous = self._segment
+        self._load(segment, version)
+        if previous is not None:
+            previous.close()
+            previous.unlink()  # Readers that already mapped it keep their mapping
+
+    def current_version(self):
+        return self.VERSION.unpack_from(self._control.buf, 0)[0]
+
+    def _refresh(self):
+        for _ in range(self.MAX_ATTACH_ATTEMPTS):
+            version = self.current_version()
+            if version == self._version:
+                return
+            try:
+                segment = self._attach(self._segment_name(version))
+            except FileNotFoundError:
+                # The owner bumps the version before unlinking the old segment,
+                # so an unchanged version means it was removed, not replaced
+                if self.current_version() == version:
+                    raise RuntimeError(f"Shared config '{self.name}' is no longer published") from None
+                continue
+            if self._segment is not None:
+                self._release(self._segment)
+            self._load(segment, version)
+            return
+        raise RuntimeError(f"Shared config '{self.name}' changed too often to attach to")
+
+    def _load(self, segment, version):
+        import marshal
+        (index_length,) = self.INDEX_LENGTH.unpack_from(segment.buf, 0)
+        start = self.INDEX_LENGTH.size
+        self._index = marshal.loads(segment.buf[start:start + index_length])
+        self._values_start = start + index_length
+        self._values = {}
+        self._segment = segment
+        self._version = version
+
+    @staticmethod
+    def _release(segment):
+        try:
+            segment.close()
+        except BufferError:
+            pass  # A caller still holds a view; the mapping is freed with it
+
+    def get(self, key, default=None):
+        self._refresh()
+        value = self._values.get(key, self._values)
+        if value is self._values:
+            location = self._index.get(key)
+            if location is None:
+                return default
+            import marshal
+            offset, length = location
+            start = self._values_start + offset
+            value = marshal.loads(self._segment.buf[start:start + length])
+            if self._immutable(value):
+                self._values[key] = value
+        return value
+
+    @classmethod
+    def _immutable(cls, value):
+        if isinstance(value, (tuple, frozenset)):
+            return all(cls._immutable(item) for item in value)
+        return isinstance(value, cls.IMMUTABLE)
+
+    def snapshot(self):
+        self._refresh()
+        return MappingProxyType({key: self.get(key) for key in self._index})
+
+    def close(self):
+        if self._segment is not None:
+            self._release(self._segment)
+            if self._owner:
+                self._segment.unlink()
+            self._segment = None
+        self._release(self._control)
+        if self._owner:
+            self._control.unlink()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=SharedConfigStore._after_fork)
 
 
 class ConfigManager(metaclass=SingletonMeta):
+    # Readers use the current immutable snapshot without locking; writers
+    # build a new dict under a lock and publish it with a single assignment.
+    # Subscribers are called with the set of top-level keys that changed and
+    # the new snapshot. Mutable values (lists, dicts, sets) are deep-copied on
+    # the way out of get_config, snapshot and notifications, so a caller that
+    # changes one cannot alter the config every other thread reads.
+    CACHE_SUFFIX = ".cache"
+    CACHE_VERSION = 1
+
     def __init__(self):
-        self._config = {}
+        self._config = MappingProxyType({})
+        self._write_lock = threading.Lock()
+        self._subscribers = []
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self._shared = None
+
+    def share(self, name):
+        # Publishes this process's config (and every later change) to other processes
+        self._shared = SharedConfigStore(name, create=True)
+        self._shared.publish(self._config)
+
+    def attach(self, name):
+        # Reads the config another process shares, following its updates
+        self._shared = SharedConfigStore(name)
+
+    def detach(self):
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    def snapshot(self):
+        if self._shared is not None:
+            return self._shared.snapshot()
+        return self._detached_snapshot(self._config)
+
+    @staticmethod
+    def _detached(value):
+        return value if SharedConfigStore._immutable(value) else copy.deepcopy(value)
+
+    @classmethod
+    def _detached_snapshot(cls, config):
+        return MappingProxyType({key: cls._detached(value) for key, value in config.items()})
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def _publish(self, config):
+        # Called with the write lock held; subscribers are notified afterwards
+        config = MappingProxyType(config)
+        if self._shared is not None:
+            self._shared.publish(config)
+        self._config = config
+        return config
+
+    def _notify(self, changed, config):
+        if changed and self._subscribers:
+            config = self._detached_snapshot(config)
+            for callback in list(self._subscribers):
+                callback(changed, config)
+
+    @staticmethod
+    def _diff(old, new):
+        missing = object()
+        return {key for key in old.keys() | new.keys() if old.get(key, missing) != new.get(key, missing)}
 
     def set_config(self, key, value):
-        self._config[key] = value
+        with self._write_lock:
+            config = dict(self.snapshot())
+            config[key] = value = self._detached(value)
+            changed = {key} if self._config.get(key) != value or key not in self._config else set()
+            snapshot = self._publish(config)
+        self._notify(changed, snapshot)
 
     def get_config(self, key):
-        return self._config.get(key, None)
+        if self._shared is not None:
+            return self._shared.get(key)
+        return self._detached(self._config.get(key, None))
+
+    def load_config_from_file(self, filepath, use_cache=True):
+        config = self._read_config(filepath, use_cache)
+        with self._write_lock:
+            changed = self._diff(self._config, config)
+            snapshot = self._publish(config)
+        self._notify(changed, snapshot)
+
+    def _read_config(self, filepath, use_cache):
+        # Decoding builds many small containers; pausing the cyclic GC avoids
+        # repeated collections that would otherwise dominate load time
+        import gc
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._decode_config(filepath, use_cache)
+        finally:
+            if enabled:
+                gc.enable()
 
-    def load_config_from_file(self, filepath):
+    def _decode_config(self, filepath, use_cache):
+        # A marshal cache next to the source skips JSON parsing when it matches
+        # the source's mtime, size and SHA-256
+        import hashlib
         import json
-        with open(filepath, 'r') as f:
-            self._config = json.load(f)
+        import marshal
+        import os
+        with open(filepath, 'rb') as f:
+            source = f.read()
+            stat = os.fstat(f.fileno())
+        if not use_cache:
+            return json.loads(source)
+        signature = (self.CACHE_VERSION, stat.st_mtime_ns, stat.st_size, hashlib.sha256(source).digest())
+        cache_path = filepath + self.CACHE_SUFFIX
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_signature, config = marshal.loads(f.read())
+            if cached_signature == signature:
+                return config
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        config = json.loads(source)
+        try:
+            temporary = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temporary, 'wb') as f:
+                marshal.dump((signature, config), f)
+            os.replace(temporary, cache_path)
+        except OSError:
+            pass  # The cache is an optimisation; a read-only directory is fine
+        return config
+
+    def watch(self, filepath, interval=1.0):
+        # Polls the file's mtime and size and reloads in the background on change
+        import os
+        self.stop_watching()
+        self._stop_watching.clear()
+
+        def stat_key():
+            try:
+                stat = os.stat(filepath)
+            except FileNotFoundError:
+                return None
+            return stat.st_mtime_ns, stat.st_size
+
+        def poll(last):
+            while not self._stop_watching.wait(interval):
+                current = stat_key()
+                if current is not None and current != last:
+                    try:
+                        self.load_config_from_file(filepath)
+                    except ValueError:
+                        continue  # Partially written file; retry on the next poll
+                    except OSError:
+                        logger.exception("Could not reload config from %s", filepath)
+                        continue
+                    except Exception:
+                        # The new config is published; only a subscriber failed
+                        logger.exception("Config subscriber failed after reloading %s", filepath)
+                    last = current
+
+        # Stat before loading, so a write landing during the load is seen as a change
+        last = stat_key()
+        self.load_config_from_file(filepath)
+        self._watcher = threading.Thread(target=poll, args=(last,), name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
 
     def save_config_to_file(self, filepath):
         import json
         with open(filepath, 'w') as f:
-            json.dump(self._config, f, indent=4)
+            json.dump(dict(self.snapshot()), f, indent=4)
 
 
 if __name__=="__main__":
@@ -62,4 +410,19 @@ if __name__=="__main__":
 
     config_manager1.set_config('database_url', 'mysql://localhost:3306/mydb')
     
-    print(config_manager2.get_config('database_url'))  
\ No newline at end of file
+    print(config_manager2.get_config('database_url'))
+
+    import json
+    import os
+    import tempfile
+    import time
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = os.path.join(directory, "config.json")
+        with open(config_path, "w") as f:
+            json.dump({"database_url": "mysql://localhost:3306/mydb", "workers": 4}, f)
+        config_manager1.subscribe(lambda changed, config: print(f"Changed keys: {sorted(changed)}"))
+        config_manager1.watch(config_path, interval=0.05)  # Changed keys: ['workers']
+        with open(config_path, "w") as f:
+            json.dump({"database_url": "mysql://localhost:3306/mydb", "workers": 8}, f)
+        time.sleep(0.2)                                     # Changed keys: ['workers']
+        config_manager1.stop_watching()
@@ -1,4 +1,9 @@
 from abc import ABC, abstractmethod
+import bisect
+import os
+import struct
+import time
+from collections import Counter
 
 """
 # State Pattern
@@ -29,78 +34,355 @@ Handling the states of a network connection (e.g., connecting, connected, discon
 """
 
 # State Interface
+# States are stateless flyweights shared by every machine; the context is
+# passed in on each call instead of being held as a back-reference.
 class State(ABC):
     @abstractmethod
-    def insert_coin(self):
+    def insert_coin(self, vending_machine):
         pass
 
     @abstractmethod
-    def select_item(self):
+    def select_item(self, vending_machine):
         pass
 
     @abstractmethod
-    def dispense_item(self):
+    def dispense_item(self, vending_machine):
         pass
 
 # Concrete States
 class NoCoinState(State):
-    def __init__(self, vending_machine):
-        self.vending_machine = vending_machine
+    code = 0
 
-    def insert_coin(self):
-        print("Coin inserted.")
-        self.vending_machine.state = self.vending_machine.has_coin_state
+    def insert_coin(self, vending_machine):
+        vending_machine.display("Coin inserted.")
+        vending_machine.state = vending_machine.has_coin_state
 
-    def select_item(self):
-        print("You need to insert a coin first.")
+    def select_item(self, vending_machine):
+        vending_machine.display("You need to insert a coin first.")
 
-    def dispense_item(self):
-        print("You need to insert a coin first.")
+    def dispense_item(self, vending_machine):
+        vending_machine.display("You need to insert a coin first.")
 
 class HasCoinState(State):
-    def __init__(self, vending_machine):
-        self.vending_machine = vending_machine
+    code = 1
 
-    def insert_coin(self):
-        print("Coin already inserted.")
+    def insert_coin(self, vending_machine):
+        vending_machine.display("Coin already inserted.")
 
-    def select_item(self):
-        print("Item selected.")
-        self.vending_machine.state = self.vending_machine.item_selected_state
+    def select_item(self, vending_machine):
+        vending_machine.display("Item selected.")
+        vending_machine.state = vending_machine.item_selected_state
 
-    def dispense_item(self):
-        print("You need to select an item first.")
+    def dispense_item(self, vending_machine):
+        vending_machine.display("You need to select an item first.")
 
 class ItemSelectedState(State):
-    def __init__(self, vending_machine):
-        self.vending_machine = vending_machine
+    code = 2
 
-    def insert_coin(self):
-        print("Coin already inserted and item selected.")
+    def insert_coin(self, vending_machine):
+        vending_machine.display("Coin already inserted and item selected.")
 
-    def select_item(self):
-        print("Item already selected.")
+    def select_item(self, vending_machine):
+        vending_machine.display("Item already selected.")
 
-    def dispense_item(self):
-        print("Dispensing item...")
-        self.vending_machine.state = self.vending_machine.no_coin_state
+    def dispense_item(self, vending_machine):
+        vending_machine.display("Dispensing item...")
+        vending_machine.state = vending_machine.no_coin_state
 
 # Context
 class VendingMachine:
+    __slots__ = ("state",)
+
+    no_coin_state = NoCoinState()
+    has_coin_state = HasCoinState()
+    item_selected_state = ItemSelectedState()
+
     def __init__(self):
-        self.no_coin_state = NoCoinState(self)
-        self.has_coin_state = HasCoinState(self)
-        self.item_selected_state = ItemSelectedState(self)
         self.state = self.no_coin_state
 
     def insert_coin(self):
-        self.state.insert_coin()
+        self.state.insert_coin(self)
+
+    def select_item(self):
+        self.state.select_item(self)
+
+    def dispense_item(self):
+        self.state.dispense_item(self)
+
+    # States report the outcome of every event through the context
+    def display(self, message):
+        print(message)
+
+# Append-only log of fixed-width transition records (machine, from-state,
+# event, to-state, timestamp). Records are packed into an in-memory buffer and
+# written in blocks; every `snapshot_interval` records the state of every
+# machine seen so far is appended to a snapshot file, so the state of a
+# machine at any time is rebuilt by replaying from the nearest snapshot.
+class TransitionLog:
+    RECORD = struct.Struct("<IBBBxQ")
+    SNAPSHOT_HEADER = struct.Struct("<QQI")  # record index, timestamp, machine count
+    SNAPSHOT_ENTRY = struct.Struct("<IB")
+    INSERT_COIN, SELECT_ITEM, DISPENSE_ITEM = range(3)
+
+    def __init__(self, path, snapshot_interval=1_000_000, buffer_records=4096, clock=time.time_ns):
+        self.path = path
+        self.snapshot_path = path + ".snapshots"
+        self.snapshot_interval = snapshot_interval
+        self.clock = clock
+        self._buffer = bytearray(self.RECORD.size * buffer_records)
+        self._buffered = 0
+        self._last_timestamp = 0
+        self._recover(path)
+        self._states = self.states_at(path) if os.path.exists(path) else {}
+        self._file = open(path, "ab")
+        self._snapshots = open(self.snapshot_path, "ab")
+        self._count = self._file.tell() // self.RECORD.size
+
+    def _recover(self, path):
+        # Cuts off a record or snapshot torn by a crash, so new records stay
+        # aligned and no snapshot refers to records that were never written
+        if not os.path.exists(path):
+            return
+        count = os.path.getsize(path) // self.RECORD.size
+        os.truncate(path, count * self.RECORD.size)
+        if os.path.exists(self.snapshot_path):
+            end = 0
+            for index, _, body_offset, entries in self._snapshot_index(path):
+                if index > count:
+                    break
+                end = body_offset + entries * self.SNAPSHOT_ENTRY.size
+            os.truncate(self.snapshot_path, end)
+
+    def record(self, machine_id, from_state, event, to_state):
+        timestamp = self._last_timestamp = self.clock()
+        self.RECORD.pack_into(self._buffer, self._buffered * self.RECORD.size,
+                              machine_id, from_state, event, to_state, timestamp)
+        self._buffered += 1
+        self._count += 1
+        self._states[machine_id] = to_state
+        if self._buffered * self.RECORD.size == len(self._buffer):
+            self._write_buffer()
+        if self._count % self.snapshot_interval == 0:
+            self.snapshot()
+
+    def current_state(self, machine_id):
+        # Latest recorded state code of the machine, or None if it has none
+        return self._states.get(machine_id)
+
+    def _write_buffer(self):
+        self._file.write(memoryview(self._buffer)[:self._buffered * self.RECORD.size])
+        self._buffered = 0
+
+    def snapshot(self):
+        self.flush()
+        parts = [self.SNAPSHOT_HEADER.pack(self._count, self._last_timestamp, len(self._states))]
+        parts.extend(self.SNAPSHOT_ENTRY.pack(machine_id, state) for machine_id, state in self._states.items())
+        self._snapshots.write(b"".join(parts))
+        self._snapshots.flush()
+
+    def flush(self):
+        self._write_buffer()
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._snapshots.close()
+
+    @classmethod
+    def iter_records(cls, path, start=0, chunk_records=1 << 16):
+        # Streams records in fixed-size chunks, starting at record index `start`
+        with open(path, "rb") as f:
+            f.seek(start * cls.RECORD.size)
+            while True:
+                chunk = f.read(cls.RECORD.size * chunk_records)
+                chunk = chunk[:len(chunk) - len(chunk) % cls.RECORD.size]
+                if not chunk:
+                    return
+                yield from cls.RECORD.iter_unpack(chunk)
+
+    @classmethod
+    def _snapshot_index(cls, path):
+        # Reads only the snapshot headers, seeking past each body; returns
+        # (record index, timestamp, body offset, entry count) per complete snapshot
+        snapshot_path = path + ".snapshots"
+        if not os.path.exists(snapshot_path):
+            return []
+        snapshots = []
+        size = os.path.getsize(snapshot_path)
+        with open(snapshot_path, "rb") as f:
+            while True:
+                header = f.read(cls.SNAPSHOT_HEADER.size)
+                if len(header) < cls.SNAPSHOT_HEADER.size:
+                    return snapshots
+                index, taken_at, count = cls.SNAPSHOT_HEADER.unpack(header)
+                body_offset = f.tell()
+                if body_offset + count * cls.SNAPSHOT_ENTRY.size > size:
+                    return snapshots
+                snapshots.append((index, taken_at, body_offset, count))
+                f.seek(count * cls.SNAPSHOT_ENTRY.size, os.SEEK_CUR)
+
+    @classmethod
+    def _nearest_snapshot(cls, path, timestamp):
+        # Returns (record index, states) of the last snapshot taken at or before
+        # `timestamp`, decoding only that snapshot's body
+        snapshots = cls._snapshot_index(path)
+        if timestamp is not None:
+            snapshots = snapshots[:bisect.bisect_right([taken_at for _, taken_at, _, _ in snapshots], timestamp)]
+        if not snapshots:
+            return 0, {}
+        index, _, body_offset, count = snapshots[-1]
+        with open(path + ".snapshots", "rb") as f:
+            f.seek(body_offset)
+            body = f.read(count * cls.SNAPSHOT_ENTRY.size)
+        return index, dict(cls.SNAPSHOT_ENTRY.iter_unpack(body))
+
+    @classmethod
+    def states_at(cls, path, timestamp=None):
+        index, states = cls._nearest_snapshot(path, timestamp)
+        for machine_id, _, _, to_state, recorded_at in cls.iter_records(path, index):
+            if timestamp is not None and recorded_at > timestamp:
+                break
+            states[machine_id] = to_state
+        return states
+
+    @classmethod
+    def state_at(cls, path, machine_id, timestamp=None):
+        index, states = cls._nearest_snapshot(path, timestamp)
+        state = states.get(machine_id, NoCoinState.code)
+        for record_machine, _, _, to_state, recorded_at in cls.iter_records(path, index):
+            if timestamp is not None and recorded_at > timestamp:
+                break
+            if record_machine == machine_id:
+                state = to_state
+        return state
+
+    @classmethod
+    def transition_counts(cls, path, chunk_records=1 << 16):
+        # Counts (from-state, event, to-state) triples without loading the log
+        counts = Counter()
+        for machine_id, from_state, event, to_state, _ in cls.iter_records(path, 0, chunk_records):
+            counts[from_state, event, to_state] += 1
+        return counts
+
+# Context that appends every event it handles to a TransitionLog; plain
+# VendingMachines are unaffected
+class LoggedVendingMachine(VendingMachine):
+    __slots__ = ("log", "machine_id")
+
+    def __init__(self, log, machine_id):
+        super().__init__()
+        self.log = log
+        self.machine_id = machine_id
+        # A machine already in a reopened log resumes from its recorded state
+        code = log.current_state(machine_id)
+        if code is not None:
+            self.state = next(state for state in (self.no_coin_state, self.has_coin_state, self.item_selected_state)
+                              if state.code == code)
+
+    def insert_coin(self):
+        before = self.state
+        before.insert_coin(self)
+        self.log.record(self.machine_id, before.code, TransitionLog.INSERT_COIN, self.state.code)
 
     def select_item(self):
-        self.state.select_item()
+        before = self.state
+        before.select_item(self)
+        self.log.record(self.machine_id, before.code, TransitionLog.SELECT_ITEM, self.state.code)
 
     def dispense_item(self):
-        self.state.dispense_item()
+        before = self.state
+        before.dispense_item(self)
+        self.log.record(self.machine_id, before.code, TransitionLog.DISPENSE_ITEM, self.state.code)
+
+# Table-driven engine for fleets of vending machines. The concrete states are
+# compiled into next-state and outcome tables by running every (state, event)
+# pair against a probe context that records the outcome each state reports
+# through display() instead of printing it; machine states are then held in one uint8
+# NumPy array and batches of (machine_id, event) pairs are applied with
+# vectorised table lookups. Outcomes are returned as codes into `outcomes`
+# instead of being printed.
+class VendingFleet:
+    STATES = (NoCoinState, HasCoinState, ItemSelectedState)
+    EVENTS = ("insert_coin", "select_item", "dispense_item")
+    INSERT_COIN, SELECT_ITEM, DISPENSE_ITEM = range(3)
+
+    class _Probe:
+        def __init__(self, states):
+            self.no_coin_state, self.has_coin_state, self.item_selected_state = states
+            self.state = None
+            self.message = None
+
+        def display(self, message):
+            self.message = message
+
+    def __init__(self, size):
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError("VendingFleet requires the 'numpy' package") from e
+        self._np = np
+        self.next_state, self.outcome, self.outcomes = self.compile_table()
+        self.next_state = np.asarray(self.next_state, dtype=np.uint8)
+        self.outcome = np.asarray(self.outcome, dtype=np.uint8)
+        self.states = np.zeros(size, dtype=np.uint8)
+
+    @classmethod
+    def compile_table(cls):
+        tokens = tuple(object() for _ in cls.STATES)
+        outcomes, next_state, outcome = [], [], []
+        for state_class in cls.STATES:
+            next_row, outcome_row = [], []
+            for event in cls.EVENTS:
+                probe = cls._Probe(tokens)
+                current = probe.state = tokens[cls.STATES.index(state_class)]
+                getattr(state_class(), event)(probe)
+                message = probe.message
+                if message not in outcomes:
+                    outcomes.append(message)
+                next_row.append(tokens.index(probe.state if probe.state is not None else current))
+                outcome_row.append(outcomes.index(message))
+            next_state.append(next_row)
+            outcome.append(outcome_row)
+        return next_state, outcome, outcomes
+
+    def apply(self, machine_ids, events):
+        # Events for the same machine are applied in batch order: the batch is
+        # split into rounds holding at most one event per machine
+        np = self._np
+        machine_ids = np.asarray(machine_ids, dtype=np.intp)
+        events = np.asarray(events, dtype=np.uint8)
+        codes = np.empty(len(machine_ids), dtype=np.uint8)
+        if not len(machine_ids):
+            return codes
+        if machine_ids.min() < 0 or machine_ids.max() >= len(self.states):
+            raise IndexError(f"Machine ids must be in range(0, {len(self.states)})")
+        order = np.argsort(machine_ids, kind="stable")
+        sorted_ids = machine_ids[order]
+        group_start = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        group_sizes = np.diff(np.r_[group_start, len(sorted_ids)])
+        if group_sizes.max() == 1:
+            return self._step(machine_ids, events, codes, slice(None))
+        rank = np.empty(len(machine_ids), dtype=np.intp)
+        rank[order] = np.arange(len(sorted_ids)) - np.repeat(group_start, group_sizes)
+        # One stable sort by rank lays the rounds out as contiguous slices
+        by_rank = np.argsort(rank, kind="stable")
+        round_sizes = np.bincount(rank)
+        bounds = np.r_[0, np.cumsum(round_sizes)]
+        for round_ in range(len(round_sizes)):
+            self._step(machine_ids, events, codes, by_rank[bounds[round_]:bounds[round_ + 1]])
+        return codes
+
+    def _step(self, machine_ids, events, codes, rows):
+        ids = machine_ids[rows]
+        current = self.states[ids]
+        event = events[rows]
+        codes[rows] = self.outcome[current, event]
+        self.states[ids] = self.next_state[current, event]
+        return codes
+
+    def state_names(self, machine_ids):
+        return [self.STATES[code].__name__ for code in self.states[machine_ids]]
 
 if __name__ == "__main__":
     vending_machine = VendingMachine()
@@ -113,3 +395,27 @@ if __name__ == "__main__":
     vending_machine.insert_coin()      # Coin inserted.
     vending_machine.insert_coin()      # Coin already inserted.
     vending_machine.select_item()      # Item selected.
+
+    try:
+        fleet = VendingFleet(size=1_000_000)
+        codes = fleet.apply([0, 0, 0, 7], [VendingFleet.INSERT_COIN, VendingFleet.SELECT_ITEM,
+                                           VendingFleet.DISPENSE_ITEM, VendingFleet.SELECT_ITEM])
+        print([fleet.outcomes[code] for code in codes])  # Coin inserted., Item selected., Dispensing item..., You need to insert a coin first.
+    except ImportError as e:
+        print(e)
+
+    import contextlib
+    import io
+    import tempfile
+    with tempfile.TemporaryDirectory() as log_dir:
+        log_path = os.path.join(log_dir, "transitions.log")
+        transition_log = TransitionLog(log_path, snapshot_interval=2)
+        logged_machine = LoggedVendingMachine(transition_log, machine_id=42)
+        with contextlib.redirect_stdout(io.StringIO()):
+            logged_machine.insert_coin()
+            logged_machine.select_item()
+            logged_machine.dispense_item()
+            logged_machine.insert_coin()
+        transition_log.close()
+        print(TransitionLog.state_at(log_path, 42))            # 1 (HasCoinState)
+        print(sorted(TransitionLog.transition_counts(log_path).items()))
@@ -0,0 +1,139 @@
+
+"""
+# State Benchmark
+
+Measures the per-machine memory and transition throughput of `VendingMachine` in `state.py`
+against the previous design, in which every machine built its own three state objects and
+each state held a back-reference to the machine.
+
+Reported per design: bytes per machine (traced allocations), objects the cyclic GC had to
+reclaim after the machines were dropped, and transitions per second.
+
+**Usage:**
+python state_benchmark.py --machines 100000 --transitions 300000
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from state import HasCoinState, ItemSelectedState, NoCoinState, VendingMachine
+
+
+# Previous design, kept here as the baseline: per-machine states with back-references
+class _LegacyState:
+    def __init__(self, vending_machine):
+        self.vending_machine = vending_machine
+
+
+class _LegacyNoCoinState(_LegacyState):
+    def insert_coin(self):
+        print("Coin inserted.")
+        self.vending_machine.state = self.vending_machine.has_coin_state
+
+    def select_item(self):
+        print("You need to insert a coin first.")
+
+    def dispense_item(self):
+        print("You need to insert a coin first.")
+
+
+class _LegacyHasCoinState(_LegacyState):
+    def insert_coin(self):
+        print("Coin already inserted.")
+
+    def select_item(self):
+        print("Item selected.")
+        self.vending_machine.state = self.vending_machine.item_selected_state
+
+    def dispense_item(self):
+        print("You need to select an item first.")
+
+
+class _LegacyItemSelectedState(_LegacyState):
+    def insert_coin(self):
+        print("Coin already inserted and item selected.")
+
+    def select_item(self):
+        print("Item already selected.")
+
+    def dispense_item(self):
+        print("Dispensing item...")
+        self.vending_machine.state = self.vending_machine.no_coin_state
+
+
+class LegacyVendingMachine:
+    def __init__(self):
+        self.no_coin_state = _LegacyNoCoinState(self)
+        self.has_coin_state = _LegacyHasCoinState(self)
+        self.item_selected_state = _LegacyItemSelectedState(self)
+        self.state = self.no_coin_state
+
+    def insert_coin(self):
+        self.state.insert_coin()
+
+    def select_item(self):
+        self.state.select_item()
+
+    def dispense_item(self):
+        self.state.dispense_item()
+
+
+def measure_memory(machine_class, machines):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        fleet = [machine_class() for _ in range(machines)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # The list holding the machines is not part of a machine's footprint
+    per_machine = (after - before - sys.getsizeof(fleet)) / machines
+
+    gc.collect()
+    del fleet
+    reclaimed_by_gc = gc.collect()
+    return per_machine, reclaimed_by_gc
+
+
+def measure_throughput(machine_class, transitions):
+    machine = machine_class()
+    cycle = (machine.insert_coin, machine.select_item, machine.dispense_item, machine.select_item)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for step in range(transitions):
+            cycle[step & 3]()
+        elapsed = time.perf_counter() - start
+    return transitions / elapsed
+
+
+def run(machines=100_000, transitions=300_000):
+    report = {}
+    for label, machine_class in (("before", LegacyVendingMachine), ("after", VendingMachine)):
+        per_machine, reclaimed = measure_memory(machine_class, machines)
+        report[label] = {
+            "bytes_per_machine": per_machine,
+            "gc_reclaimed_objects": reclaimed,
+            "transitions_per_s": measure_throughput(machine_class, transitions),
+        }
+    report["memory_reduction"] = report["before"]["bytes_per_machine"] / report["after"]["bytes_per_machine"]
+    report["shared_states"] = [cls.__name__ for cls in (NoCoinState, HasCoinState, ItemSelectedState)]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare flyweight VendingMachine against the previous design.")
+    parser.add_argument("--machines", type=int, default=100_000)
+    parser.add_argument("--transitions", type=int, default=300_000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.machines, args.transitions), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,17 @@ Payment methods in an e-commerce application.
 **Example in Python (Sorting algorithms use-case):**
 """
 
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from operator import gt
+
+
 class SortStrategy:
     def sort(self, data):
         pass
@@ -44,6 +55,135 @@ class BubbleSort(SortStrategy):
         return data
 
 
+class AdaptiveSort(SortStrategy):
+    # Inspects the input and dispatches to the cheapest path: an O(n) pass for
+    # already-ordered runs, counting sort for dense integer ranges, NumPy for
+    # large homogeneous numeric batches and timsort for everything else.
+    NUMPY_THRESHOLD = 50_000
+    COUNTING_RANGE_FACTOR = 2
+    NEARLY_SORTED_RATIO = 0.05
+    INT64_MIN, INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+    def __init__(self, numpy_threshold=NUMPY_THRESHOLD, counting_range_factor=COUNTING_RANGE_FACTOR):
+        self.numpy_threshold = numpy_threshold
+        self.counting_range_factor = counting_range_factor
+
+    def sort(self, data):
+        data = data if isinstance(data, list) else list(data)
+        n = len(data)
+        if n < 2:
+            return list(data)
+
+        types = set(map(type, data))
+
+        # Ordered or reverse-ordered input is handled in a single pass
+        descents = sum(map(gt, data, islice(data, 1, None)))
+        if descents == 0:
+            return list(data)
+        if descents == n - 1:
+            return data[::-1]
+
+        if types == {int}:
+            lo, hi = min(data), max(data)
+            if hi - lo <= n * self.counting_range_factor:
+                return self._counting_sort(data, lo, hi)
+            if n >= self.numpy_threshold and descents > n * self.NEARLY_SORTED_RATIO \
+                    and self.INT64_MIN <= lo and hi <= self.INT64_MAX:
+                return self._numpy_sort(data, "int64") or sorted(data)
+        elif types == {float} and n >= self.numpy_threshold and descents > n * self.NEARLY_SORTED_RATIO:
+            return self._numpy_sort(data, "float64") or sorted(data)
+
+        # Timsort exploits existing runs, so it also covers nearly sorted data
+        return sorted(data)
+
+    @staticmethod
+    def _counting_sort(data, lo, hi):
+        counts = Counter(data)
+        result = []
+        for value in range(lo, hi + 1):
+            count = counts.get(value)
+            if count:
+                result.extend(repeat(value, count))
+        return result
+
+    @staticmethod
+    def _numpy_sort(data, dtype):
+        try:
+            import numpy as np
+        except ImportError:
+            return None
+        return np.sort(np.array(data, dtype=dtype), kind="stable").tolist()
+
+
+# Helpers for ExternalMergeSort; module level so the process pool can pickle them
+def _spill_sorted_run(chunk, tmpdir, block_size):
+    chunk.sort()
+    with tempfile.NamedTemporaryFile("wb", dir=tmpdir, suffix=".run", delete=False) as f:
+        for start in range(0, len(chunk), block_size):
+            pickle.dump(chunk[start:start + block_size], f, pickle.HIGHEST_PROTOCOL)
+        return f.name
+
+
+def _read_run(path):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from block
+
+
+class ExternalMergeSort(SortStrategy):
+    # Out-of-core sort: sorted runs are built in a process pool and spilled to
+    # temporary files, then streamed back through a k-way heap merge. Accepts
+    # any iterable, or a text file (sorted line by line) given as an
+    # os.PathLike or through `path=`; a plain str is sorted as characters.
+    # Runs are merged in input order, so equal elements keep their order.
+    def __init__(self, run_size=1_000_000, max_workers=None, block_size=4096, tmpdir=None):
+        self.run_size = run_size
+        self.max_workers = max_workers
+        self.block_size = block_size
+        self.tmpdir = tmpdir
+
+    def sort(self, data=None, path=None):
+        if path is None and isinstance(data, os.PathLike):
+            path = data
+        if path is not None:
+            return self._sort_file(path)
+        return self._merge(iter(data))
+
+    def _sort_file(self, filepath):
+        with open(filepath, "r") as f:
+            yield from self._merge(line.rstrip("\n") for line in f)
+
+    def _chunks(self, items):
+        while True:
+            chunk = list(islice(items, self.run_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _merge(self, items):
+        workers = self.max_workers or os.cpu_count() or 1
+        tmpdir = tempfile.mkdtemp(prefix="extsort-", dir=self.tmpdir)
+        try:
+            # Futures are collected in submission order so heapq.merge breaks
+            # ties between runs in input order
+            runs, pending = [], deque()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for chunk in self._chunks(items):
+                    # Bound the chunks held in memory to one per worker
+                    if len(pending) >= workers:
+                        runs.append(pending.popleft().result())
+                    pending.append(pool.submit(_spill_sorted_run, chunk, tmpdir, self.block_size))
+                    del chunk
+                runs.extend(future.result() for future in pending)
+            yield from heapq.merge(*(_read_run(path) for path in runs))
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
 class Context:
     def __init__(self, strategy: SortStrategy):
         self._strategy = strategy
@@ -63,3 +203,9 @@ if __name__=="__main__":
 
     context.set_strategy(BubbleSort())
     print(context.sort_data(data)) 
+
+    context.set_strategy(AdaptiveSort())
+    print(context.sort_data(data))
+
+    context.set_strategy(ExternalMergeSort(run_size=2))
+    print(list(context.sort_data(data)))
@@ -0,0 +1,256 @@
+
+"""
+# Strategy Benchmark
+
+Reproducible benchmark harness for every `SortStrategy` in `strategy.py`.
+
+Each strategy is run against a fixed set of seeded input shapes (random, sorted, reversed,
+many duplicates, strings) over a range of sizes. Every sample sorts fresh copies of the input
+until at least `--min-time` seconds have passed, so small inputs are timed over many calls
+rather than one. Throughput, min/p50/max time per sort and peak memory are reported as JSON,
+and results can be compared against a saved baseline.
+
+A case is only flagged as a regression when its p50 is more than `--tolerance` slower, the
+slowdown exceeds the `--noise-floor-ms` absolute floor, and its fastest sample is still slower
+than the baseline's slowest, i.e. the two runs' spreads do not overlap.
+
+`peak_traced_bytes_parent` only covers allocations made in the benchmark process itself; work
+done in worker processes (e.g. `ExternalMergeSort` runs) does not show up there. For those,
+`child_peak_rss_bytes` reports the peak RSS of the largest finished child process. The OS keeps
+a single high-water mark for all children, so it is only reported for a case that raised it and
+is `null` otherwise, or when the platform has no `resource` module.
+
+**Usage:**
+python strategy_benchmark.py --sizes 10 1000 100000 --output results.json
+python strategy_benchmark.py --baseline results.json --tolerance 0.10
+"""
+
+import argparse
+import gc
+import json
+import random
+import string
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from strategy import BubbleSort, SortStrategy
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_REPEATS = 7
+DEFAULT_MIN_TIME = 0.02
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_NOISE_FLOOR_MS = 0.01
+SEED = 1234
+
+# Quadratic strategies are skipped above these sizes so a full run finishes
+MAX_SIZES = {BubbleSort: 5_000}
+
+
+# Input shapes
+def random_ints(n, rng):
+    return [rng.randint(-2 ** 31, 2 ** 31) for _ in range(n)]
+
+
+def sorted_ints(n, rng):
+    return sorted(random_ints(n, rng))
+
+
+def reversed_ints(n, rng):
+    return sorted(random_ints(n, rng), reverse=True)
+
+
+def duplicate_ints(n, rng):
+    return [rng.randint(0, 15) for _ in range(n)]
+
+
+def random_strings(n, rng):
+    letters = string.ascii_letters
+    return ["".join(rng.choices(letters, k=12)) for _ in range(n)]
+
+
+SHAPES = {
+    "random": random_ints,
+    "sorted": sorted_ints,
+    "reversed": reversed_ints,
+    "duplicates": duplicate_ints,
+    "strings": random_strings,
+}
+
+
+def discover_strategies():
+    found, stack = [], list(SortStrategy.__subclasses__())
+    while stack:
+        cls = stack.pop()
+        found.append(cls)
+        stack.extend(cls.__subclasses__())
+    return sorted(set(found), key=lambda cls: cls.__name__)
+
+
+def _consume(result):
+    # Lazy strategies return iterators; drain them so their work is measured
+    if not isinstance(result, list):
+        deque(result, maxlen=0)
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _child_peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _time_loops(strategy, data, loops):
+    # Copies are made up front so copying is not part of the timing
+    samples = [list(data) for _ in range(loops)]
+    gc.collect()
+    start = time.perf_counter()
+    for sample in samples:
+        _consume(strategy.sort(sample))
+    return time.perf_counter() - start
+
+
+def _calibrate(strategy, data, min_time):
+    loops = 1
+    while True:
+        elapsed = _time_loops(strategy, data, loops)
+        if elapsed >= min_time:
+            return loops
+        # Aim a little past min_time, growing at least twofold per attempt
+        loops = max(loops * 2, int(loops * 1.2 * min_time / elapsed) if elapsed else 0)
+
+
+def run_case(strategy_cls, data, repeats, min_time=DEFAULT_MIN_TIME):
+    strategy = strategy_cls()
+    child_peak_before = _child_peak_rss()
+    loops = _calibrate(strategy, data, min_time)
+    timings = [_time_loops(strategy, data, loops) / loops for _ in range(repeats)]
+
+    # Memory is traced in a separate run so tracing does not skew the timings
+    sample = list(data)
+    tracemalloc.start()
+    try:
+        _consume(strategy.sort(sample))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    child_peak = _child_peak_rss()
+
+    p50 = _percentile(timings, 50)
+    return {
+        "throughput": len(data) / p50 if p50 else None,
+        "loops": loops,
+        "min_ms": min(timings) * 1000,
+        "p50_ms": p50 * 1000,
+        "max_ms": max(timings) * 1000,
+        "peak_traced_bytes_parent": peak,
+        "child_peak_rss_bytes": child_peak if child_peak != child_peak_before else None,
+    }
+
+
+def run_benchmarks(strategies=None, sizes=DEFAULT_SIZES, shapes=SHAPES, repeats=DEFAULT_REPEATS, seed=SEED,
+                   min_time=DEFAULT_MIN_TIME):
+    strategies = strategies or discover_strategies()
+    results = []
+    for shape_name, make_input in shapes.items():
+        for size in sizes:
+            data = make_input(size, random.Random(f"{seed}:{shape_name}:{size}"))
+            for strategy_cls in strategies:
+                if size > MAX_SIZES.get(strategy_cls, size):
+                    continue
+                case = {"strategy": strategy_cls.__name__, "shape": shape_name, "size": size}
+                case.update(run_case(strategy_cls, data, repeats, min_time))
+                results.append(case)
+                print(f"{case['strategy']:>20} {shape_name:>10} {size:>10}  p50={case['p50_ms']:.3f}ms",
+                      file=sys.stderr)
+    return {
+        "python": sys.version.split()[0],
+        "seed": seed,
+        "repeats": repeats,
+        "min_time": min_time,
+        "results": results,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE, noise_floor_ms=DEFAULT_NOISE_FLOOR_MS):
+    previous = {(r["strategy"], r["shape"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for case in report["results"]:
+        old = previous.get((case["strategy"], case["shape"], case["size"]))
+        if old is None or not old["p50_ms"]:
+            continue
+        change = case["p50_ms"] / old["p50_ms"] - 1
+        if change <= tolerance or case["p50_ms"] - old["p50_ms"] <= noise_floor_ms:
+            continue
+        # Baselines saved before min/max were recorded only have a p50
+        if case["min_ms"] > old.get("max_ms", old["p50_ms"]):
+            regressions.append({
+                "strategy": case["strategy"],
+                "shape": case["shape"],
+                "size": case["size"],
+                "baseline_p50_ms": old["p50_ms"],
+                "p50_ms": case["p50_ms"],
+                "change": change,
+            })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every SortStrategy implementation.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=list(SHAPES))
+    parser.add_argument("--strategies", nargs="+", help="Strategy class names to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Timed samples per case")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME,
+                        help="Minimum seconds each sample runs for; short sorts are repeated to fill it")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="Compare against a previously saved JSON report")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed fractional p50 slowdown before a case is flagged")
+    parser.add_argument("--noise-floor-ms", type=float, default=DEFAULT_NOISE_FLOOR_MS,
+                        help="Ignore p50 slowdowns smaller than this many milliseconds")
+    args = parser.parse_args(argv)
+
+    strategies = discover_strategies()
+    if args.strategies:
+        strategies = [cls for cls in strategies if cls.__name__ in args.strategies]
+        if not strategies:
+            parser.error(f"No strategies match: {', '.join(args.strategies)}")
+
+    report = run_benchmarks(strategies, args.sizes, {name: SHAPES[name] for name in args.shapes},
+                            args.repeats, args.seed, args.min_time)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance, args.noise_floor_ms)
+        report["regressions"] = regressions
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['strategy']} {regression['shape']} {regression['size']}: "
+              f"{regression['change']:+.1%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())